@@ -3,13 +3,18 @@
 Build script for dosawithmouli.html
 Reads dosawithmouli-data.json, generates a static photo-grid page.
 Run: python3 build-dosawithmouli.py
+dwm-updater.py imports this and calls build_html().
 """
 
 import json
 import os
+import sys
 from collections import defaultdict
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "scripts"))
+from site_templates import load_templates
+
 DATA_FILE = os.path.join(SCRIPT_DIR, "dosawithmouli-data.json")
 OUTPUT_FILE = os.path.join(SCRIPT_DIR, "dosawithmouli.html")
 
@@ -26,96 +31,11 @@ X_ICON = '''<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewB
 LINKEDIN_ICON = '''<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M16 8a6 6 0 0 1 6 6v7h-4v-7a2 2 0 0 0-2-2 2 2 0 0 0-2 2v7h-4v-7a6 6 0 0 1 6-6z"></path><rect x="2" y="9" width="4" height="12"></rect><circle cx="4" cy="4" r="2"></circle></svg>'''
 
 
-def format_month(date_str):
-    parts = date_str.split("-")
-    month = MONTH_NAMES.get(parts[1], parts[1]) if len(parts) > 1 else ""
-    return month
-
-
-def build_card(entry):
-    month = format_month(entry["date"])
-    person = entry["person"]
-    venue = entry["venue"]
-    photo = entry.get("photo", "")
-    twitter = entry.get("twitter")
-    linkedin = entry.get("linkedin")
-
-    photo_html = ""
-    if photo:
-        photo_html = f'''<div class="card-photo">
-                    <img src="{photo}" alt="Dosa with {person}" onerror="this.parentElement.classList.add('no-photo')">
-                </div>'''
-
-    social_links = []
-    if twitter:
-        social_links.append(
-            f'<a href="{twitter}" target="_blank" rel="noopener noreferrer" aria-label="View on X" class="social-icon">{X_ICON}</a>'
-        )
-    if linkedin:
-        social_links.append(
-            f'<a href="{linkedin}" target="_blank" rel="noopener noreferrer" aria-label="View on LinkedIn" class="social-icon">{LINKEDIN_ICON}</a>'
-        )
-    social_html = "\n                    ".join(social_links) if social_links else ""
+# Rendered card width: a third of the 960px page, half the screen on phones
+CARD_SIZES = "(max-width: 768px) 50vw, 300px"
 
-    return f'''<div class="card">
-                {photo_html}
-                <div class="card-body">
-                    <div class="card-info">
-                        <span class="card-person">{person}</span>
-                        <span class="card-meta">{month} &middot; {venue}</span>
-                    </div>
-                    <div class="card-social">
-                        {social_html}
-                    </div>
-                </div>
-            </div>'''
-
-
-def build_html(entries):
-    entries.sort(key=lambda e: e["date"], reverse=True)
-
-    by_year = defaultdict(list)
-    for entry in entries:
-        year = entry["date"].split("-")[0]
-        by_year[year].append(entry)
-
-    total = len(entries)
-
-    sections_html = ""
-    for year in sorted(by_year.keys(), reverse=True):
-        cards = "\n            ".join(build_card(e) for e in by_year[year])
-        sections_html += f'''
-        <section class="year-section">
-            <h2 class="year-label">{year}</h2>
-            <div class="card-grid">
-                {cards}
-            </div>
-        </section>'''
-
-    return f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>#DosaWithMouli - GC Mouli</title>
-    <link rel="icon" type="image/png" href="favicon-32x32.png">
-
-    <!-- Google Fonts -->
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Lora:ital,wght@0,400;0,500;0,600;1,400&family=Playfair+Display:wght@500;600;700&family=Source+Sans+3:wght@400;500;600&display=swap" rel="stylesheet">
-
-    <!-- Google Analytics -->
-    <script async src="https://www.googletagmanager.com/gtag/js?id=G-NGJ9C40ZGL"></script>
-    <script>
-        window.dataLayer = window.dataLayer || [];
-        function gtag(){{dataLayer.push(arguments);}}
-        gtag('js', new Date());
-        gtag('config', 'G-NGJ9C40ZGL');
-    </script>
-
-    <style>
-        :root {{
+PAGE_STYLE = '''<style>
+        :root {
             --cream: #FAF8F5;
             --warm-white: #FFFEFA;
             --ink: #2C2416;
@@ -123,19 +43,19 @@ def build_html(entries):
             --accent: #7C5E4A;
             --accent-hover: #5C4535;
             --border: #E8E2D9;
-        }}
+        }
 
-        * {{
+        * {
             box-sizing: border-box;
             margin: 0;
             padding: 0;
-        }}
+        }
 
-        html {{
+        html {
             font-size: 18px;
-        }}
+        }
 
-        body {{
+        body {
             font-family: 'Lora', Georgia, serif;
             line-height: 1.75;
             color: var(--ink);
@@ -143,31 +63,31 @@ def build_html(entries):
             min-height: 100vh;
             display: flex;
             flex-direction: column;
-        }}
+        }
 
-        .page-container {{
+        .page-container {
             max-width: 960px;
             margin: 0 auto;
             padding: 0 2rem;
             flex: 1;
             display: flex;
             flex-direction: column;
-        }}
+        }
 
         /* Navigation */
-        nav {{
+        nav {
             padding: 2rem 0;
             font-family: 'Source Sans 3', sans-serif;
-        }}
+        }
 
-        nav ul {{
+        nav ul {
             list-style: none;
             display: flex;
             gap: 2rem;
             flex-wrap: wrap;
-        }}
+        }
 
-        nav a {{
+        nav a {
             color: var(--muted);
             text-decoration: none;
             font-size: 0.85rem;
@@ -175,64 +95,64 @@ def build_html(entries):
             text-transform: uppercase;
             letter-spacing: 0.1em;
             transition: color 0.2s;
-        }}
+        }
 
-        nav a:hover {{
+        nav a:hover {
             color: var(--ink);
-        }}
+        }
 
-        nav a.active {{
+        nav a.active {
             color: var(--ink);
-        }}
+        }
 
         /* Hero */
-        .hero {{
+        .hero {
             padding: 3rem 0 1.5rem;
             text-align: center;
-        }}
+        }
 
-        .hero h1 {{
+        .hero h1 {
             font-family: 'Playfair Display', Georgia, serif;
             font-size: 3.2rem;
             font-weight: 600;
             line-height: 1.1;
             letter-spacing: -0.02em;
             margin-bottom: 0.75rem;
-        }}
+        }
 
-        .hero .intro {{
+        .hero .intro {
             font-size: 1rem;
             color: var(--muted);
             line-height: 1.6;
             max-width: 520px;
             margin: 0 auto;
-        }}
+        }
 
         /* Stats */
-        .stats {{
+        .stats {
             text-align: center;
             padding: 0.75rem 0 2rem;
             font-family: 'Source Sans 3', sans-serif;
-        }}
+        }
 
-        .stats p {{
+        .stats p {
             font-size: 0.85rem;
             color: var(--muted);
             letter-spacing: 0.08em;
             text-transform: uppercase;
-        }}
+        }
 
-        .stats strong {{
+        .stats strong {
             color: var(--accent);
             font-weight: 600;
-        }}
+        }
 
         /* Year sections */
-        .year-section {{
+        .year-section {
             margin-bottom: 2.5rem;
-        }}
+        }
 
-        .year-label {{
+        .year-label {
             font-family: 'Playfair Display', Georgia, serif;
             font-size: 1.6rem;
             font-weight: 600;
@@ -240,44 +160,50 @@ def build_html(entries):
             padding-bottom: 0.5rem;
             margin-bottom: 1rem;
             border-bottom: 1px solid var(--border);
-        }}
+        }
 
         /* Card grid */
-        .card-grid {{
+        .card-grid {
             display: grid;
             grid-template-columns: repeat(3, 1fr);
             gap: 1.25rem;
-        }}
+        }
 
         /* Cards */
-        .card {{
+        .card {
             background: var(--warm-white);
             border: 1px solid var(--border);
             border-radius: 8px;
             overflow: hidden;
             transition: box-shadow 0.2s, transform 0.2s;
-        }}
+        }
 
-        .card:hover {{
+        .card:hover {
             box-shadow: 0 4px 16px rgba(44, 36, 22, 0.1);
             transform: translateY(-2px);
-        }}
+        }
 
-        .card-photo {{
+        .card-photo {
             width: 100%;
             aspect-ratio: 1 / 1;
             overflow: hidden;
             background: var(--border);
-        }}
+        }
+
+        .card-photo picture {
+            display: block;
+            width: 100%;
+            height: 100%;
+        }
 
-        .card-photo img {{
+        .card-photo img {
             width: 100%;
             height: 100%;
             object-fit: cover;
             display: block;
-        }}
+        }
 
-        .card-photo.no-photo {{
+        .card-photo.no-photo {
             display: flex;
             align-items: center;
             justify-content: center;
@@ -286,129 +212,205 @@ def build_html(entries):
             font-size: 0.75rem;
             text-align: center;
             padding: 1rem;
-        }}
+        }
 
-        .card-photo.no-photo::after {{
+        .card-photo.no-photo::after {
             content: 'Photo coming soon';
-        }}
+        }
 
-        .card-photo.no-photo img {{
+        .card-photo.no-photo img {
             display: none;
-        }}
+        }
 
-        .card-body {{
+        .card-body {
             padding: 0.75rem 0.85rem;
             display: flex;
             justify-content: space-between;
             align-items: flex-start;
             gap: 0.5rem;
-        }}
+        }
 
-        .card-info {{
+        .card-info {
             display: flex;
             flex-direction: column;
             min-width: 0;
-        }}
+        }
 
-        .card-person {{
+        .card-person {
             font-family: 'Playfair Display', Georgia, serif;
             font-size: 0.9rem;
             font-weight: 600;
             line-height: 1.3;
-        }}
+        }
 
-        .card-meta {{
+        .card-meta {
             font-family: 'Source Sans 3', sans-serif;
             font-size: 0.72rem;
             color: var(--muted);
             line-height: 1.4;
             margin-top: 0.15rem;
-        }}
+        }
 
-        .card-social {{
+        .card-social {
             display: flex;
             gap: 0.4rem;
             flex-shrink: 0;
             padding-top: 0.1rem;
-        }}
+        }
 
-        .social-icon {{
+        .social-icon {
             color: var(--border);
             transition: color 0.2s;
-        }}
+        }
 
-        .social-icon:hover {{
+        .social-icon:hover {
             color: var(--accent);
-        }}
+        }
 
         /* Footer */
-        footer {{
+        footer {
             padding: 2rem 0;
             margin-top: auto;
             font-family: 'Source Sans 3', sans-serif;
             font-size: 0.8rem;
             color: var(--muted);
-        }}
+        }
 
         /* Responsive */
-        @media (max-width: 768px) {{
-            html {{
+        @media (max-width: 768px) {
+            html {
                 font-size: 16px;
-            }}
+            }
 
-            .page-container {{
+            .page-container {
                 padding: 0 1.25rem;
-            }}
+            }
 
-            .hero {{
+            .hero {
                 padding: 2.5rem 0 1rem;
-            }}
+            }
 
-            .hero h1 {{
+            .hero h1 {
                 font-size: 2.4rem;
-            }}
+            }
 
-            nav ul {{
+            nav ul {
                 gap: 1.25rem;
-            }}
+            }
 
-            .card-grid {{
+            .card-grid {
                 grid-template-columns: repeat(2, 1fr);
                 gap: 1rem;
-            }}
-        }}
+            }
+        }
 
-        @media (max-width: 480px) {{
-            .card-grid {{
+        @media (max-width: 480px) {
+            .card-grid {
                 grid-template-columns: repeat(2, 1fr);
                 gap: 0.75rem;
-            }}
+            }
 
-            .card-body {{
+            .card-body {
                 padding: 0.6rem 0.7rem;
-            }}
+            }
 
-            .card-person {{
+            .card-person {
                 font-size: 0.8rem;
-            }}
+            }
 
-            .card-meta {{
+            .card-meta {
                 font-size: 0.65rem;
-            }}
-        }}
-    </style>
-</head>
+            }
+        }
+    </style>'''
+
+
+def format_month(date_str):
+    parts = date_str.split("-")
+    month = MONTH_NAMES.get(parts[1], parts[1]) if len(parts) > 1 else ""
+    return month
+
+
+def build_card(entry):
+    month = format_month(entry["date"])
+    person = entry["person"]
+    venue = entry["venue"]
+    photo = entry.get("photo", "")
+    twitter = entry.get("twitter")
+    linkedin = entry.get("linkedin")
+
+    photo_html = ""
+    renditions = entry.get("renditions")
+    if photo and renditions:
+        # Square card-sized renditions from scripts/photo_renditions.py; the
+        # largest JPEG stands in for browsers without srcset
+        jpeg_srcset = ", ".join(f'{r["jpeg"]} {r["width"]}w' for r in renditions)
+        webp_srcset = ", ".join(f'{r["webp"]} {r["width"]}w' for r in renditions)
+        largest = renditions[-1]
+        photo_html = f'''<div class="card-photo">
+                    <picture>
+                        <source type="image/webp" srcset="{webp_srcset}" sizes="{CARD_SIZES}">
+                        <img src="{largest["jpeg"]}" srcset="{jpeg_srcset}" sizes="{CARD_SIZES}" width="{largest["width"]}" height="{largest["width"]}" loading="lazy" alt="Dosa with {person}" onerror="this.closest('.card-photo').classList.add('no-photo')">
+                    </picture>
+                </div>'''
+    elif photo:
+        photo_html = f'''<div class="card-photo">
+                    <img src="{photo}" alt="Dosa with {person}" onerror="this.parentElement.classList.add('no-photo')">
+                </div>'''
+
+    social_links = []
+    if twitter:
+        social_links.append(
+            f'<a href="{twitter}" target="_blank" rel="noopener noreferrer" aria-label="View on X" class="social-icon">{X_ICON}</a>'
+        )
+    if linkedin:
+        social_links.append(
+            f'<a href="{linkedin}" target="_blank" rel="noopener noreferrer" aria-label="View on LinkedIn" class="social-icon">{LINKEDIN_ICON}</a>'
+        )
+    social_html = "\n                    ".join(social_links) if social_links else ""
+
+    return f'''<div class="card">
+                {photo_html}
+                <div class="card-body">
+                    <div class="card-info">
+                        <span class="card-person">{person}</span>
+                        <span class="card-meta">{month} &middot; {venue}</span>
+                    </div>
+                    <div class="card-social">
+                        {social_html}
+                    </div>
+                </div>
+            </div>'''
+
+
+def build_html(entries):
+    entries.sort(key=lambda e: e["date"], reverse=True)
+
+    by_year = defaultdict(list)
+    for entry in entries:
+        year = entry["date"].split("-")[0]
+        by_year[year].append(entry)
+
+    total = len(entries)
+    templates = load_templates()
+
+    sections_html = ""
+    for year in sorted(by_year.keys(), reverse=True):
+        cards = "\n            ".join(build_card(e) for e in by_year[year])
+        sections_html += f'''
+        <section class="year-section">
+            <h2 class="year-label">{year}</h2>
+            <div class="card-grid">
+                {cards}
+            </div>
+        </section>'''
+
+    return f'''<!DOCTYPE html>
+<html lang="en">
+{templates.head("#DosaWithMouli - " + templates.site_name, stylesheet=False, extra=PAGE_STYLE)}
 <body>
     <div class="page-container">
-        <nav>
-            <ul>
-                <li><a href="index.html">Home</a></li>
-                <li><a href="blog.html">Blog</a></li>
-                <li><a href="https://sonofcauverybook.in/html/index.html">Son of Cauvery</a></li>
-                <li><a href="https://www.flickr.com/photos/gcmouli/" target="_blank" rel="noopener noreferrer">Photography</a></li>
-                <li><a href="dosawithmouli.html" class="active">#DosaWithMouli</a></li>
-            </ul>
-        </nav>
+        {templates.nav(indent=8, active="dosawithmouli.html")}
 
         <header class="hero">
             <h1>#DosaWithMouli</h1>
@@ -423,9 +425,7 @@ def build_html(entries):
             {sections_html}
         </main>
 
-        <footer>
-            <p>&copy; 2025 Mouli Gopalakrishnan</p>
-        </footer>
+        {templates.footer()}
     </div>
 </body>
 </html>'''
@@ -3,20 +3,59 @@
 DWM Updater - Local admin UI for managing dosawithmouli-data.json
 Run: python3 dwm-updater.py
 Opens browser to http://localhost:8111
+Load test: python3 dwm-updater.py --load-test
 """
 
+import email.utils
+import gzip
+import hashlib
+import importlib.util
 import json
 import os
-import subprocess
+import socket
+import sys
+import tempfile
+import threading
+import time
 import webbrowser
 import uuid
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from http.server import HTTPServer, ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse
+from urllib.request import urlopen
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "scripts"))
+from site_templates import load_templates
+import photo_renditions
+
 DATA_FILE = os.path.join(SCRIPT_DIR, "dosawithmouli-data.json")
+BUILD_SCRIPT = os.path.join(SCRIPT_DIR, "build-dosawithmouli.py")
 PHOTO_DIR = os.path.join(SCRIPT_DIR, "dosa-photos")
 PORT = 8111
+# Requests handled at once; further connections wait for a free worker
+MAX_WORKERS = 8
+
+# Text responses smaller than this are sent uncompressed
+GZIP_MIN_BYTES = 1024
+
+# Uploads are streamed to disk in chunks of this size, and refused above the limit
+CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+# Longest multipart header block or preamble accepted
+MAX_HEADER_BYTES = 16 * 1024
+
+# Requests run concurrently: saves, uploads and builds take these so that
+# the data file is never read half-written and only one build runs at a time
+DATA_LOCK = threading.Lock()
+BUILD_LOCK = threading.Lock()
+
+# Renditions are made off the request thread, one photo at a time. RENDITIONS
+# holds the latest result per photo path (None while a new upload is pending)
+# and wins over whatever the browser sends back on save.
+PHOTO_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dwm-photos')
+RENDITIONS = {}
 
 ADMIN_HTML = r'''<!DOCTYPE html>
 <html lang="en">
@@ -24,9 +63,7 @@ ADMIN_HTML = r'''<!DOCTYPE html>
 <meta charset="UTF-8">
 <meta name="viewport" content="width=device-width, initial-scale=1.0">
 <title>DWM Updater - Admin</title>
-<link rel="preconnect" href="https://fonts.googleapis.com">
-<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-<link href="https://fonts.googleapis.com/css2?family=Lora:ital,wght@0,400;0,500;0,600;1,400&family=Playfair+Display:wght@500;600;700&family=Source+Sans+3:wght@400;500;600&display=swap" rel="stylesheet">
+<!--site-fonts-->
 <style>
 :root {
     --cream: #FAF8F5;
@@ -403,6 +440,14 @@ body {
 
 .btn-build:hover { opacity: 0.85; }
 
+.btn-preview {
+    background: var(--warm-white);
+    color: var(--ink);
+    border: 1px solid var(--border);
+}
+
+.btn-preview:hover { background: var(--cream); }
+
 .btn-primary:disabled {
     opacity: 0.5;
     cursor: not-allowed;
@@ -490,6 +535,7 @@ body {
 
 <div class="bottom-bar">
     <button class="btn-primary btn-save-all" id="saveAllBtn" onclick="saveAll()">Save All to Disk</button>
+    <button class="btn-primary btn-preview" id="previewBtn" onclick="previewHtml()">Preview</button>
     <button class="btn-primary btn-build" id="buildBtn" onclick="buildHtml()">Build HTML</button>
 </div>
 
@@ -508,6 +554,8 @@ const LI_ICON = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fil
 let entries = [];
 let dirty = false;
 let editingIndex = null; // index of entry currently in edit mode
+// Photos replaced this session; other photos are cached and revalidated
+const photoVersions = {};
 
 function setDirty(v) {
     dirty = v;
@@ -580,7 +628,8 @@ function renderPreview(entry) {
 
     let photoHtml;
     if (photo) {
-        photoHtml = `<img src="/${escHtml(photo)}?t=${Date.now()}" alt="" onerror="this.parentElement.innerHTML='No photo'">`;
+        const version = photoVersions[photo] ? `?v=${photoVersions[photo]}` : '';
+        photoHtml = `<img src="/${escHtml(photo)}${version}" alt="" onerror="this.parentElement.innerHTML='No photo'">`;
     } else {
         photoHtml = 'No photo';
     }
@@ -788,6 +837,7 @@ async function uploadPhoto(idx, file) {
         const result = await resp.json();
         if (result.ok) {
             entries[idx].photo = result.path;
+            photoVersions[result.path] = Date.now();
             setDirty(true);
             render();
             showToast('Photo uploaded: ' + result.path, 'success');
@@ -844,6 +894,28 @@ async function buildHtml() {
     btn.textContent = 'Build HTML';
 }
 
+// Preview the page with the entries as edited, saved or not
+async function previewHtml() {
+    const win = window.open('', 'dwm-preview');
+    try {
+        const resp = await fetch('/api/preview', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(entries)
+        });
+        const result = await resp.json();
+        if (result.ok) {
+            win.location = '/preview';
+        } else {
+            win.close();
+            showToast('Preview failed:\n' + result.error, 'error', 8000);
+        }
+    } catch(err) {
+        win.close();
+        showToast('Preview failed: ' + err.message, 'error');
+    }
+}
+
 // Initial load
 async function loadData() {
     try {
@@ -871,37 +943,271 @@ loadData();
 </html>'''
 
 
+def load_data():
+    with DATA_LOCK:
+        with open(DATA_FILE, 'r') as f:
+            return json.load(f)
+
+
+def _write_data(data):
+    tmp_file = DATA_FILE + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    os.replace(tmp_file, DATA_FILE)
+
+
+def save_data(data):
+    """Save the entries from the browser, keeping the server's record of renditions."""
+    with DATA_LOCK:
+        known = {}
+        if os.path.exists(DATA_FILE):
+            with open(DATA_FILE, 'r') as f:
+                known = {entry['photo']: entry['renditions'] for entry in json.load(f)
+                         if entry.get('photo') and entry.get('renditions')}
+        known.update(RENDITIONS)
+        for entry in data:
+            renditions = known.get(entry.get('photo'))
+            if renditions:
+                entry['renditions'] = renditions
+            else:
+                entry.pop('renditions', None)
+        _write_data(data)
+
+
+# build-dosawithmouli.py, imported
+_builder = {'mtime_ns': None, 'module': None}
+# Entries last sent for preview; the saved data until then
+PREVIEW = {'entries': None}
+
+
+def load_builder():
+    """The builder module, reloaded when the script is edited."""
+    mtime_ns = os.stat(BUILD_SCRIPT).st_mtime_ns
+    if _builder['mtime_ns'] != mtime_ns:
+        spec = importlib.util.spec_from_file_location('build_dosawithmouli', BUILD_SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _builder.update(mtime_ns=mtime_ns, module=module)
+    return _builder['module']
+
+
+def render_page(entries):
+    """Build dosawithmouli.html in-process; returns (builder, html)."""
+    with BUILD_LOCK:
+        builder = load_builder()
+        return builder, builder.build_html(list(entries))
+
+
+def process_photo(photo):
+    """Make the renditions of an uploaded photo and record them in the data file."""
+    try:
+        renditions = photo_renditions.make_renditions(photo, SCRIPT_DIR)
+    except Exception as e:
+        print(f'Could not make renditions of {photo}: {e}', file=sys.stderr)
+        return
+    with DATA_LOCK:
+        RENDITIONS[photo] = renditions
+        with open(DATA_FILE, 'r') as f:
+            data = json.load(f)
+        if photo_renditions.apply_renditions(data, photo, renditions):
+            _write_data(data)
+
+
+class UploadError(Exception):
+    """An upload that cannot be accepted, with the HTTP status to answer."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class MultipartStream:
+    """Reads a multipart/form-data body from a socket file, one part at a time.
+
+    At most CHUNK_SIZE bytes plus a boundary's length are held in memory,
+    however large the parts are.
+    """
+
+    def __init__(self, rfile, length, boundary):
+        self.rfile = rfile
+        self.remaining = length
+        self.delimiter = b'\r\n--' + boundary.encode('latin-1')
+        # The first boundary is not preceded by CRLF; pretend it is
+        self.buffer = b'\r\n'
+
+    def _fill(self):
+        if self.remaining <= 0:
+            raise UploadError('Malformed multipart body')
+        chunk = self.rfile.read(min(CHUNK_SIZE, self.remaining))
+        if not chunk:
+            raise UploadError('Upload ended early')
+        self.remaining -= len(chunk)
+        self.buffer += chunk
+
+    def _read_until(self, marker):
+        while True:
+            end = self.buffer.find(marker)
+            if end >= 0:
+                data = self.buffer[:end]
+                self.buffer = self.buffer[end + len(marker):]
+                return data
+            if len(self.buffer) > MAX_HEADER_BYTES:
+                raise UploadError('Malformed multipart body')
+            self._fill()
+
+    def _body(self):
+        keep = len(self.delimiter) - 1
+        while True:
+            end = self.buffer.find(self.delimiter)
+            if end >= 0:
+                chunk = self.buffer[:end]
+                self.buffer = self.buffer[end + len(self.delimiter):]
+                if chunk:
+                    yield chunk
+                return
+            # Hold back what could be the start of a delimiter split across reads
+            if len(self.buffer) > keep:
+                chunk = self.buffer[:-keep]
+                self.buffer = self.buffer[-keep:]
+                yield chunk
+            self._fill()
+
+    def parts(self):
+        """Yield (headers, chunks) per part; chunks must be consumed before the next part."""
+        self._read_until(self.delimiter)
+        while True:
+            while len(self.buffer) < 2:
+                self._fill()
+            if self.buffer.startswith(b'--'):
+                return
+            self._read_until(b'\r\n')
+            headers = self._read_until(b'\r\n\r\n').decode('utf-8', errors='replace')
+            body = self._body()
+            yield headers, body
+            for _ in body:
+                pass
+
+
+def receive_upload(rfile, length, boundary, field='photo'):
+    """Stream the file in the multipart field to a temp file in PHOTO_DIR.
+
+    Returns (temp path, original filename); the caller renames the temp
+    file into place. Nothing is left behind if the upload fails.
+    """
+    os.makedirs(PHOTO_DIR, exist_ok=True)
+    tmp = tempfile.NamedTemporaryFile(dir=PHOTO_DIR, prefix='.upload-', delete=False)
+    orig_filename = None
+    try:
+        with tmp:
+            for headers, chunks in MultipartStream(rfile, length, boundary).parts():
+                # Parameters of the Content-Disposition header
+                params = {}
+                for line in headers.split('\r\n'):
+                    if line.lower().startswith('content-disposition:'):
+                        for token in line.split(';')[1:]:
+                            key, _, value = token.strip().partition('=')
+                            params[key.lower()] = value.strip('"')
+                if params.get('name') != field or orig_filename is not None:
+                    continue
+                orig_filename = params.get('filename')
+                for chunk in chunks:
+                    tmp.write(chunk)
+        if not orig_filename:
+            raise UploadError('No file uploaded')
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+    return tmp.name, orig_filename
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip (and does not give it q=0)."""
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            params = params.replace(' ', '')
+            try:
+                return not params.startswith('q=') or float(params[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+
+@lru_cache(maxsize=8)
+def gzip_bytes(body):
+    # The admin page and unchanged data are compressed once
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
 class DWMHandler(BaseHTTPRequestHandler):
     def log_message(self, format, *args):
         # Quieter logging
         pass
 
-    def _send_json(self, data, status=200):
-        body = json.dumps(data).encode('utf-8')
+    def _not_modified(self, etag, mtime=None):
+        """Answer 304 if the request's validators match; returns whether it did."""
+        if_none_match = self.headers.get('If-None-Match')
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            fresh = '*' in tags or etag in tags
+        elif if_modified_since is not None and mtime is not None:
+            try:
+                fresh = int(mtime) <= email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                fresh = False
+        else:
+            fresh = False
+        if fresh:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+        return fresh
+
+    def _send_text(self, body, content_type, status=200):
+        """Send body, gzipped when the client accepts it; 200s carry an ETag of the content."""
+        compress = accepts_gzip(self.headers.get('Accept-Encoding', '')) and len(body) >= GZIP_MIN_BYTES
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}{"-gzip" if compress else ""}"'
+        if status == 200 and self._not_modified(etag):
+            return
+        if compress:
+            body = gzip_bytes(body)
         self.send_response(status)
-        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Type', content_type)
+        self.send_header('Vary', 'Accept-Encoding')
+        if compress:
+            self.send_header('Content-Encoding', 'gzip')
+        if status == 200:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
         self.send_header('Content-Length', str(len(body)))
         self.end_headers()
         self.wfile.write(body)
 
+    def _send_json(self, data, status=200):
+        self._send_text(json.dumps(data).encode('utf-8'), 'application/json', status)
+
     def _send_html(self, html):
-        body = html.encode('utf-8')
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/html; charset=utf-8')
-        self.send_header('Content-Length', str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
+        self._send_text(html.encode('utf-8'), 'text/html; charset=utf-8')
 
     def _send_file(self, filepath, content_type):
         try:
             with open(filepath, 'rb') as f:
-                data = f.read()
-            self.send_response(200)
-            self.send_header('Content-Type', content_type)
-            self.send_header('Content-Length', str(len(data)))
-            self.send_header('Cache-Control', 'no-cache')
-            self.end_headers()
-            self.wfile.write(data)
+                stat = os.fstat(f.fileno())
+                etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+                if self._not_modified(etag, stat.st_mtime):
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(stat.st_size))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', email.utils.formatdate(stat.st_mtime, usegmt=True))
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                # Straight from the file to the socket, without reading it into memory
+                self.connection.sendfile(f)
         except FileNotFoundError:
             self.send_response(404)
             self.end_headers()
@@ -911,14 +1217,22 @@ class DWMHandler(BaseHTTPRequestHandler):
         path = parsed.path
 
         if path == '/' or path == '':
-            self._send_html(ADMIN_HTML)
+            self._send_html(ADMIN_HTML.replace("<!--site-fonts-->", load_templates().fonts(indent="")))
+            return
+
+        if path == '/preview':
+            try:
+                entries = PREVIEW['entries']
+                if entries is None:
+                    entries = load_data()
+                self._send_html(render_page(entries)[1])
+            except Exception as e:
+                self._send_json({'error': str(e)}, 500)
             return
 
         if path == '/api/data':
             try:
-                with open(DATA_FILE, 'r') as f:
-                    data = json.load(f)
-                self._send_json(data)
+                self._send_json(load_data())
             except Exception as e:
                 self._send_json({'error': str(e)}, 500)
             return
@@ -952,10 +1266,7 @@ class DWMHandler(BaseHTTPRequestHandler):
             try:
                 length = int(self.headers.get('Content-Length', 0))
                 body = self.rfile.read(length)
-                data = json.loads(body)
-                with open(DATA_FILE, 'w') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                    f.write('\n')
+                save_data(json.loads(body))
                 self._send_json({'ok': True})
             except Exception as e:
                 self._send_json({'ok': False, 'error': str(e)}, 500)
@@ -972,8 +1283,14 @@ class DWMHandler(BaseHTTPRequestHandler):
                     return
 
                 # Parse multipart form data manually (cgi module removed in 3.13)
-                length = int(self.headers.get('Content-Length', 0))
-                body = self.rfile.read(length)
+                if 'Content-Length' not in self.headers:
+                    self._send_json({'ok': False, 'error': 'Content-Length required'}, 411)
+                    return
+                length = int(self.headers['Content-Length'])
+                if length > MAX_UPLOAD_BYTES:
+                    self._send_json({'ok': False, 'error': f'Upload larger than '
+                                     f'{MAX_UPLOAD_BYTES // (1024 * 1024)} MB'}, 413)
+                    return
 
                 # Extract boundary from Content-Type
                 boundary = None
@@ -987,77 +1304,71 @@ class DWMHandler(BaseHTTPRequestHandler):
                     self._send_json({'ok': False, 'error': 'No boundary in Content-Type'}, 400)
                     return
 
-                boundary_bytes = ('--' + boundary).encode()
-                parts = body.split(boundary_bytes)
-
-                file_data = None
-                orig_filename = None
-                for part in parts:
-                    if b'Content-Disposition' not in part:
-                        continue
-                    # Split headers from body at double CRLF
-                    header_end = part.find(b'\r\n\r\n')
-                    if header_end < 0:
-                        continue
-                    header_section = part[:header_end].decode('utf-8', errors='replace')
-                    file_body = part[header_end + 4:]
-                    # Strip trailing \r\n-- or \r\n
-                    if file_body.endswith(b'\r\n'):
-                        file_body = file_body[:-2]
-
-                    if 'name="photo"' in header_section:
-                        # Extract filename
-                        for token in header_section.split(';'):
-                            token = token.strip()
-                            if token.startswith('filename='):
-                                orig_filename = token[len('filename='):].strip('"')
-                        file_data = file_body
-
-                if file_data is None or not orig_filename:
-                    self._send_json({'ok': False, 'error': 'No file uploaded'}, 400)
-                    return
-
-                # Read current data to generate filename from person name
-                with open(DATA_FILE, 'r') as f:
-                    current_data = json.load(f)
+                tmp_path, orig_filename = receive_upload(self.rfile, length, boundary)
 
-                # Determine filename
-                ext = os.path.splitext(orig_filename)[1].lower()
-                if not ext:
-                    ext = '.jpg'
+                try:
+                    # Read current data to generate filename from person name
+                    current_data = load_data()
 
-                if idx < len(current_data) and current_data[idx].get('person'):
-                    base = current_data[idx]['person'].lower().replace(' ', '-')
-                    base = ''.join(c for c in base if c.isalnum() or c == '-')
-                else:
-                    base = 'photo-' + uuid.uuid4().hex[:8]
+                    # Determine filename
+                    ext = os.path.splitext(orig_filename)[1].lower()
+                    if not ext:
+                        ext = '.jpg'
 
-                filename = base + ext
-                filepath = os.path.join(PHOTO_DIR, filename)
-                os.makedirs(PHOTO_DIR, exist_ok=True)
+                    if idx < len(current_data) and current_data[idx].get('person'):
+                        base = current_data[idx]['person'].lower().replace(' ', '-')
+                        base = ''.join(c for c in base if c.isalnum() or c == '-')
+                    else:
+                        base = 'photo-' + uuid.uuid4().hex[:8]
 
-                with open(filepath, 'wb') as f:
-                    f.write(file_data)
+                    filename = base + ext
+                    # The photo appears complete or not at all
+                    os.chmod(tmp_path, 0o644)
+                    os.replace(tmp_path, os.path.join(PHOTO_DIR, filename))
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
 
                 rel_path = 'dosa-photos/' + filename
+                if photo_renditions.available():
+                    with DATA_LOCK:
+                        RENDITIONS[rel_path] = None
+                    PHOTO_POOL.submit(process_photo, rel_path)
                 self._send_json({'ok': True, 'path': rel_path})
+            except UploadError as e:
+                self._send_json({'ok': False, 'error': str(e)}, e.status)
+            except Exception as e:
+                self._send_json({'ok': False, 'error': str(e)}, 500)
+            return
+
+        if path == '/api/preview':
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                PREVIEW['entries'] = json.loads(self.rfile.read(length))
+                self._send_json({'ok': True})
             except Exception as e:
                 self._send_json({'ok': False, 'error': str(e)}, 500)
             return
 
         if path == '/api/build':
             try:
-                result = subprocess.run(
-                    ['python3', 'build-dosawithmouli.py'],
-                    cwd=SCRIPT_DIR,
-                    capture_output=True,
-                    text=True,
-                    timeout=30,
-                )
-                output = result.stdout + result.stderr
+                started = time.perf_counter()
+                entries = load_data()
+                builder, html = render_page(entries)
+                unchanged = False
+                if os.path.exists(builder.OUTPUT_FILE):
+                    with open(builder.OUTPUT_FILE, 'r') as f:
+                        unchanged = f.read() == html
+                if not unchanged:
+                    tmp_file = builder.OUTPUT_FILE + '.tmp'
+                    with open(tmp_file, 'w') as f:
+                        f.write(html)
+                    os.replace(tmp_file, builder.OUTPUT_FILE)
+                elapsed = (time.perf_counter() - started) * 1000
                 self._send_json({
-                    'ok': result.returncode == 0,
-                    'output': output.strip(),
+                    'ok': True,
+                    'output': f'Generated {builder.OUTPUT_FILE} with {len(entries)} entries'
+                              f'{" (unchanged)" if unchanged else ""} in {elapsed:.0f} ms',
                 })
             except Exception as e:
                 self._send_json({'ok': False, 'output': str(e)}, 500)
@@ -1067,9 +1378,91 @@ class DWMHandler(BaseHTTPRequestHandler):
         self.end_headers()
 
 
+class PooledHTTPServer(ThreadingHTTPServer):
+    """HTTP server that handles requests on a bounded pool of worker threads."""
+    request_queue_size = 64
+
+    def __init__(self, server_address, handler_class, max_workers=MAX_WORKERS):
+        super().__init__(server_address, handler_class)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dwm')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def load_test(clients=4, requests_per_client=20, slow_seconds=2.0):
+    """Time GETs against the old single-threaded server and the pooled one.
+
+    One extra client trickles its request headers for slow_seconds, the way
+    a large upload holds the connection, while the others fetch the admin
+    page, the data and the photos. Nothing is written.
+    """
+    paths = ['/', '/api/data']
+    if os.path.isdir(PHOTO_DIR):
+        paths += ['/dosa-photos/' + name for name in sorted(os.listdir(PHOTO_DIR))[:8]]
+
+    for name, server_class in (('HTTPServer', HTTPServer), ('PooledHTTPServer', PooledHTTPServer)):
+        server = server_class(('localhost', 0), DWMHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://localhost:{server.server_address[1]}'
+
+        def trickle():
+            with socket.create_connection(server.server_address) as slow:
+                slow.sendall(b'GET / HTTP/1.0\r\n')
+                deadline = time.perf_counter() + slow_seconds
+                while time.perf_counter() < deadline:
+                    slow.sendall(b'X-Slow: 1\r\n')
+                    time.sleep(0.05)
+                slow.sendall(b'\r\n')
+                while slow.recv(65536):
+                    pass
+
+        def fetch(client):
+            latencies = []
+            for i in range(requests_per_client):
+                started = time.perf_counter()
+                with urlopen(base + paths[(client + i) % len(paths)], timeout=60) as resp:
+                    resp.read()
+                latencies.append(time.perf_counter() - started)
+            return latencies
+
+        slow_client = threading.Thread(target=trickle)
+        slow_client.start()
+        time.sleep(0.1)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            latencies = sorted(t for result in executor.map(fetch, range(clients)) for t in result)
+        elapsed = time.perf_counter() - started
+        slow_client.join()
+        server.shutdown()
+        server.server_close()
+
+        print(f'{name}: {len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / elapsed:.0f}/s), '
+              f'p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, '
+              f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms')
+
+
 def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Local admin UI for dosawithmouli-data.json.")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help=f"Requests handled at once (default: {MAX_WORKERS})")
+    parser.add_argument('--load-test', action='store_true',
+                        help="Compare the single-threaded and pooled servers under a slow client, then exit")
+    parser.add_argument('--clients', type=int, default=4, help="Concurrent clients for --load-test")
+    parser.add_argument('--requests', type=int, default=20, help="Requests per client for --load-test")
+    args = parser.parse_args()
+
     os.makedirs(PHOTO_DIR, exist_ok=True)
-    server = HTTPServer(('localhost', PORT), DWMHandler)
+    if args.load_test:
+        load_test(args.clients, args.requests)
+        return
+
+    server = PooledHTTPServer(('localhost', PORT), DWMHandler, args.workers)
     url = f'http://localhost:{PORT}'
     print(f'DWM Updater running at {url}')
     print('Press Ctrl+C to stop')
@@ -1,41 +1,308 @@
+#!/usr/bin/env python3
+"""
+Site URL emitter: sitemap.xml, robots.txt and the URL manifest from one walk.
+Pages are listed when they match an INCLUDE pattern and no EXCLUDE pattern
+(fnmatch on the site-relative path), and are neither redirects nor marked
+noindex. URLs are built on the canonical base URL, taken from CNAME.
+Posts are taken from the site index (scripts/site_index.py) instead of
+being read again; other pages are read as the walk finds them.
+Run from the site root: python3 generate_sitemap.py
+"""
+
+import fnmatch
+import gzip
+import hashlib
+import json
 import os
-from datetime import datetime
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
+import shutil
+import subprocess
+import sys
+from datetime import date
+from xml.sax.saxutils import escape
 import urllib.parse
 
-def generate_sitemap(base_url, directory):
-    urlset = Element("urlset")
-    urlset.set("xmlns", "http://www.sitemaps.org/schemas/sitemap/0.9")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from site_index import WEB_DIR, SiteIndex, is_indexable
+
+# URL manifest: canonical URL, content hash and lastmod of every listed page,
+# so lastmod only moves when a page changes
+MANIFEST_FILE = ".sitemap-manifest.json"
+
+INCLUDE = ['*.html']
+# The error page, and a copy of the 2017 archive page that ended up in posts/
+EXCLUDE = ['404.html', 'posts/2017.html']
+
+# Sitemap protocol limits per file
+MAX_URLS = 50000
+MAX_BYTES = 50 * 1024 * 1024
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+def load_manifest(manifest_file):
+    if not os.path.exists(manifest_file):
+        return {'pages': {}}
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest, manifest_file):
+    tmp_file = manifest_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_file, manifest_file)
+
+def file_hash(file_path):
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
+def git_commit_dates(directory):
+    # Date of the last commit touching each file, from a single pass over the log
+    try:
+        log = subprocess.run(['git', 'log', '--format=%x00%cs', '--name-only', '--', '.'],
+                             cwd=directory, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    dates = {}
+    commit_date = None
+    for line in log.splitlines():
+        if line.startswith('\0'):
+            commit_date = line[1:]
+        elif line and commit_date:
+            dates.setdefault(line, commit_date)
+    return dates
+
+def git_uncommitted(directory):
+    # Files that are modified, staged or untracked, so their last commit does not date them
+    try:
+        status = subprocess.run(['git', 'status', '--porcelain', '-z', '--untracked-files=all', '--', '.'],
+                                cwd=directory, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    uncommitted = set()
+    fields = iter(status.split('\0'))
+    for field in fields:
+        if not field:
+            continue
+        uncommitted.add(field[3:])
+        if field[0] in 'RC':
+            # Renames and copies are followed by their source path
+            next(fields, None)
+    return uncommitted
+
+def canonical_base_url(directory):
+    # https:// plus the GitHub Pages custom domain
+    cname = os.path.join(directory, 'CNAME')
+    if os.path.exists(cname):
+        with open(cname, 'r', encoding='utf-8') as f:
+            domain = f.read().strip()
+        if domain:
+            return f"https://{domain}"
+    return "https://gcmouli.com"
+
+def page_url(base_url, path):
+    if os.path.basename(path) == 'index.html':
+        path = path[:-len('index.html')]
+    # Encode special characters in the URL
+    return f"{base_url}/{urllib.parse.quote(path)}"
+
+def matches(path, patterns):
+    return any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
+
+def iter_pages(directory, include=INCLUDE, exclude=EXCLUDE):
+    # Site-relative paths of the listed pages, in a stable order, as the walk finds them
     for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.endswith('.html'):
-                url = SubElement(urlset, "url")
-                loc = SubElement(url, "loc")
-                path = os.path.join(root, file).replace(directory, '').replace('\\', '/')
-                if path.startswith('/'):
-                    path = path[1:]
-                if file == 'index.html':
-                    path = path.replace('index.html', '')
-                else:
-                    # Ensure .html extension
-                    path = path.rstrip('html') + '.html'
-                
-                # Encode special characters in the URL
-                encoded_path = urllib.parse.quote(path)
-                loc.text = f"{base_url}/{encoded_path}"
-                
-                lastmod = SubElement(url, "lastmod")
-                lastmod.text = datetime.now().strftime("%Y-%m-%d")
-
-    xml_string = minidom.parseString(tostring(urlset)).toprettyxml(indent="  ")
-    
-    with open("sitemap.xml", "w", encoding='utf-8') as f:
-        f.write(xml_string)
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for file in sorted(files):
+            path = os.path.relpath(os.path.join(root, file), directory).replace('\\', '/')
+            if matches(path, include) and not matches(path, exclude):
+                yield path
+
+def indexed_posts(directory, jobs=1):
+    # {site-relative path: (sha256, indexable)} for every post, from the site
+    # index; None when directory is not the site the index covers
+    if not os.path.samefile(directory, WEB_DIR):
+        return None
+    with SiteIndex.open() as site:
+        site.refresh(jobs)
+        return {f"posts/{row['filename']}": (row['content_hash'], bool(row['indexable']))
+                for row in site.all_posts()}
+
+def iter_page_lastmods(directory, manifest, entries, base_url, include=INCLUDE, exclude=EXCLUDE, indexed=None):
+    # Yield (url, lastmod) as the walk proceeds, recording each page in entries.
+    # A page keeps its recorded lastmod while its content hash is unchanged.
+    # A new or changed page gets the date of its last commit, so the output
+    # does not depend on the day it is generated; only pages with uncommitted
+    # changes (or no git history at all) are dated today.
+    today = date.today().isoformat()
+    commit_dates = uncommitted = None
+    for path in iter_pages(directory, include, exclude):
+        if indexed and path in indexed:
+            digest, indexable = indexed[path]
+        else:
+            with open(os.path.join(directory, path), 'rb') as f:
+                content = f.read()
+            digest, indexable = hashlib.sha256(content).hexdigest(), is_indexable(content)
+        if not indexable:
+            continue
+        url = page_url(base_url, path)
+        entry = manifest['pages'].get(path)
+        if entry is None or entry['sha256'] != digest:
+            if commit_dates is None:
+                commit_dates = git_commit_dates(directory)
+                uncommitted = git_uncommitted(directory)
+            if uncommitted is None or path in uncommitted:
+                lastmod = today
+            else:
+                lastmod = commit_dates.get(path, today)
+            entry = {'sha256': digest, 'lastmod': lastmod}
+        entry = {'url': url, 'sha256': entry['sha256'], 'lastmod': entry['lastmod']}
+        entries[path] = entry
+        yield url, entry['lastmod']
+
+def publish(tmp_file, output_file):
+    # Move tmp_file into place and refresh its .gz, unless output_file already has the same bytes
+    if os.path.exists(output_file) and os.path.exists(output_file + '.gz') \
+            and file_hash(tmp_file) == file_hash(output_file):
+        os.remove(tmp_file)
+        return False
+    os.replace(tmp_file, output_file)
+    with open(output_file, 'rb') as src, open(output_file + '.gz.tmp', 'wb') as raw:
+        # No name or timestamp in the header, so equal sitemaps compress to equal bytes
+        with gzip.GzipFile(filename='', mode='wb', fileobj=raw, mtime=0) as gz:
+            shutil.copyfileobj(src, gz)
+    os.replace(output_file + '.gz.tmp', output_file + '.gz')
+    return True
+
+class SitemapWriter:
+    """Stream <url> entries to disk, starting a new sitemap file at the protocol limits.
+
+    close() publishes a single sitemap as output_file, or numbered child
+    sitemaps (sitemap-1.xml, ...) with a sitemap index as output_file.
+    """
+
+    def __init__(self, output_file, base_url, max_urls=MAX_URLS, max_bytes=MAX_BYTES):
+        self.output_file = output_file
+        self.base_url = base_url
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        self.parts = []  # (tmp file, newest lastmod)
+        self.file = None
+
+    def part_name(self, number):
+        stem, ext = os.path.splitext(self.output_file)
+        return f"{stem}-{number}{ext}"
+
+    def _open_part(self):
+        tmp_file = self.part_name(len(self.parts) + 1) + '.tmp'
+        opening = XML_HEADER + f'<urlset xmlns="{SITEMAP_NS}">\n'
+        self.file = open(tmp_file, 'w', encoding='utf-8')
+        self.file.write(opening)
+        self.urls = 0
+        self.bytes = len(opening.encode('utf-8'))
+        self.parts.append([tmp_file, ''])
+
+    def _close_part(self):
+        self.file.write('</urlset>\n')
+        self.file.close()
+        self.file = None
+
+    def add(self, loc, lastmod):
+        entry = f'  <url>\n    <loc>{escape(loc)}</loc>\n    <lastmod>{lastmod}</lastmod>\n  </url>\n'
+        size = len(entry.encode('utf-8'))
+        if self.file and (self.urls >= self.max_urls or self.bytes + size + len('</urlset>\n') > self.max_bytes):
+            self._close_part()
+        if self.file is None:
+            self._open_part()
+        self.file.write(entry)
+        self.urls += 1
+        self.bytes += size
+        self.parts[-1][1] = max(self.parts[-1][1], lastmod)
+
+    def close(self):
+        """Publish the sitemap(s); returns the files that changed."""
+        if self.file is None and not self.parts:
+            self._open_part()
+        if self.file:
+            self._close_part()
+        changed = []
+        if len(self.parts) == 1:
+            finals = [(self.parts[0][0], self.output_file)]
+        else:
+            finals = [(tmp_file, self.part_name(number)) for number, (tmp_file, _) in enumerate(self.parts, 1)]
+            index_tmp = self.output_file + '.tmp'
+            with open(index_tmp, 'w', encoding='utf-8') as f:
+                f.write(XML_HEADER + f'<sitemapindex xmlns="{SITEMAP_NS}">\n')
+                for number, (_, lastmod) in enumerate(self.parts, 1):
+                    loc = f"{self.base_url}/{urllib.parse.quote(os.path.basename(self.part_name(number)))}"
+                    f.write(f'  <sitemap>\n    <loc>{escape(loc)}</loc>\n    <lastmod>{lastmod}</lastmod>\n  </sitemap>\n')
+                f.write('</sitemapindex>\n')
+            finals.append((index_tmp, self.output_file))
+        for tmp_file, output_file in finals:
+            if publish(tmp_file, output_file):
+                changed.append(output_file)
+
+        # Child sitemaps left over from a larger site
+        number = len(self.parts) + 1 if len(self.parts) > 1 else 1
+        while os.path.exists(self.part_name(number)):
+            for stale in (self.part_name(number), self.part_name(number) + '.gz'):
+                if os.path.exists(stale):
+                    os.remove(stale)
+            changed.append(self.part_name(number))
+            number += 1
+        return changed
+
+def render_robots(base_url, sitemap_file):
+    return f"User-agent: *\nDisallow:\nSitemap: {base_url}/{os.path.basename(sitemap_file)}\n"
+
+def write_if_changed(output_file, content):
+    if os.path.exists(output_file):
+        with open(output_file, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+def generate_sitemap(base_url, directory, output_file="sitemap.xml", manifest_file=MANIFEST_FILE,
+                     max_urls=MAX_URLS, max_bytes=MAX_BYTES, include=INCLUDE, exclude=EXCLUDE, jobs=1):
+    """Write the sitemap, robots.txt and the URL manifest; returns the files that changed."""
+    manifest = load_manifest(manifest_file)
+    entries = {}
+    writer = SitemapWriter(output_file, base_url, max_urls, max_bytes)
+    indexed = indexed_posts(directory, jobs)
+    for url, lastmod in iter_page_lastmods(directory, manifest, entries, base_url, include, exclude, indexed):
+        writer.add(url, lastmod)
+    changed = writer.close()
+
+    robots_file = os.path.join(directory, 'robots.txt')
+    if write_if_changed(robots_file, render_robots(base_url, output_file)):
+        changed.append(robots_file)
+    if manifest['pages'] != entries:
+        save_manifest({'pages': entries}, manifest_file)
+        changed.append(manifest_file)
+    return changed
 
 if __name__ == "__main__":
-    base_url = "https://gcmouli.com"  # Update this to your domain
-    directory = "."  # Current directory
-    generate_sitemap(base_url, directory)
-    print("Sitemap generated successfully.")
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Write sitemap.xml, robots.txt and the URL manifest for the site.")
+    parser.add_argument('directory', nargs='?', default='.', help="Site root (default: current directory)")
+    parser.add_argument('--base-url', help="Canonical base URL (default: https:// plus the domain in CNAME)")
+    parser.add_argument('--include', action='append',
+                        help=f"Pattern of pages to list (repeatable; default: {' '.join(INCLUDE)})")
+    parser.add_argument('--exclude', action='append', default=[],
+                        help=f"Pattern of pages to leave out, in addition to: {' '.join(EXCLUDE)}")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for re-indexing changed posts")
+    args = parser.parse_args()
+
+    base_url = (args.base_url or canonical_base_url(args.directory)).rstrip('/')
+    changed = generate_sitemap(base_url, args.directory,
+                               output_file=os.path.join(args.directory, 'sitemap.xml'),
+                               manifest_file=os.path.join(args.directory, MANIFEST_FILE),
+                               include=args.include or INCLUDE, exclude=EXCLUDE + args.exclude,
+                               jobs=args.jobs)
+    if changed:
+        print(f"Sitemap generated successfully: {', '.join(changed)}")
+    else:
+        print("Sitemap unchanged.")
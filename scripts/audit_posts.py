@@ -5,44 +5,67 @@ Scans all blog posts for:
 - Empty or minimal content
 - Broken/missing image references
 - Missing media files
+Posts are read from the site index (see site_index.py), so only the posts
+changed since the last run are parsed.
 """
 
 import os
-import re
 from pathlib import Path
 from bs4 import BeautifulSoup
 import json
+from site_index import SiteIndex, extract_text
 
 POSTS_DIR = Path(__file__).parent.parent / "posts"
 MEDIA_DIR = Path(__file__).parent.parent / "media"
 
+# Audit passes, run in order over every post
+AUDIT_PASSES = []
+
+class PostDocument:
+    """A post as the site index records it, shared by every audit pass.
+
+    Passes that need more than the index keeps can use soup (or text),
+    which parse the post on first use.
+    """
+
+    def __init__(self, path, row, image_srcs):
+        self.path = path
+        self.name = path.name
+        # src of every <img>, including empty ones
+        self.image_srcs = image_srcs
+        self.text_length = row['text_length']
+        self.text_preview = row['text_preview']
+        self._soup = None
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            with open(self.path, 'r', encoding='utf-8', errors='ignore') as f:
+                self._soup = BeautifulSoup(f.read(), 'html.parser')
+        return self._soup
+
+    @property
+    def text(self):
+        """Text content of the post, excluding chrome and the title."""
+        return extract_text(self.soup)
+
+def audit_pass(func):
+    """Register an audit pass.
+
+    A pass takes a PostDocument and yields (category, finding) pairs; each
+    finding is appended to results[category].
+    """
+    AUDIT_PASSES.append(func)
+    return func
+
 def get_text_content(html_content):
     """Extract text content from HTML, excluding headers and footer."""
-    soup = BeautifulSoup(html_content, 'html.parser')
-
-    # Remove header, nav, footer
-    for tag in soup.find_all(['header', 'nav', 'footer', 'script', 'style']):
-        tag.decompose()
-
-    # Get main content
-    main = soup.find('main')
-    if main:
-        # Remove the h1 title
-        h1 = main.find('h1')
-        if h1:
-            h1.decompose()
-        return main.get_text(strip=True)
-    return soup.get_text(strip=True)
+    return extract_text(BeautifulSoup(html_content, 'html.parser'))
 
 def find_images(html_content):
     """Find all image references in HTML."""
     soup = BeautifulSoup(html_content, 'html.parser')
-    images = []
-    for img in soup.find_all('img'):
-        src = img.get('src', '')
-        if src:
-            images.append(src)
-    return images
+    return [img.get('src', '') for img in soup.find_all('img') if img.get('src', '')]
 
 def check_image_exists(img_src, post_path):
     """Check if an image file exists."""
@@ -59,8 +82,48 @@ def check_image_exists(img_src, post_path):
 
     return img_path.exists()
 
-def audit_posts():
-    """Audit all blog posts."""
+@audit_pass
+def check_content_length(doc):
+    """Flag empty and minimal (under 50 characters) posts."""
+    if doc.text_length < 10:
+        yield 'empty_posts', {
+            'file': doc.name,
+            'content_length': doc.text_length,
+            'content_preview': doc.text_preview or '(empty)'
+        }
+    elif doc.text_length < 50:
+        yield 'minimal_content_posts', {
+            'file': doc.name,
+            'content_length': doc.text_length,
+            'content_preview': doc.text_preview
+        }
+
+@audit_pass
+def check_missing_images(doc):
+    """Flag images whose local file does not exist."""
+    missing_images = [src for src in doc.image_srcs
+                      if src and not check_image_exists(src, doc.path)]
+    if missing_images:
+        yield 'posts_with_missing_images', {
+            'file': doc.name,
+            'missing_images': missing_images
+        }
+
+@audit_pass
+def check_broken_img_tags(doc):
+    """Flag img tags with an empty src (reported once per post)."""
+    if any(not src.strip() for src in doc.image_srcs):
+        yield 'posts_with_broken_img_tags', {
+            'file': doc.name,
+            'issue': 'Empty src attribute'
+        }
+
+def audit_posts(passes=None, jobs=1):
+    """Audit all blog posts.
+
+    The site index is refreshed first, re-parsing changed posts on `jobs`
+    worker processes; the passes then run over what it records.
+    """
     results = {
         'total_posts': 0,
         'empty_posts': [],
@@ -69,59 +132,29 @@ def audit_posts():
         'posts_with_broken_img_tags': [],
     }
 
-    post_files = list(POSTS_DIR.glob('*.html'))
-    results['total_posts'] = len(post_files)
+    with SiteIndex.open(posts_dir=POSTS_DIR) as site:
+        changed = site.refresh(jobs)
+        docs = [PostDocument(POSTS_DIR / row['filename'], row, site.images(row['slug']))
+                for row in site.all_posts()]
+    results['total_posts'] = len(docs)
 
-    for post_path in sorted(post_files):
+    for doc in docs:
         try:
-            with open(post_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
-            # Check for empty/minimal content
-            text_content = get_text_content(content)
-
-            if len(text_content) < 10:
-                results['empty_posts'].append({
-                    'file': post_path.name,
-                    'content_length': len(text_content),
-                    'content_preview': text_content[:100] if text_content else '(empty)'
-                })
-            elif len(text_content) < 50:
-                results['minimal_content_posts'].append({
-                    'file': post_path.name,
-                    'content_length': len(text_content),
-                    'content_preview': text_content[:100]
-                })
-
-            # Check for images
-            images = find_images(content)
-            missing_images = []
-            for img_src in images:
-                if not check_image_exists(img_src, post_path):
-                    missing_images.append(img_src)
-
-            if missing_images:
-                results['posts_with_missing_images'].append({
-                    'file': post_path.name,
-                    'missing_images': missing_images
-                })
-
-            # Check for broken img tags (empty src or malformed)
-            soup = BeautifulSoup(content, 'html.parser')
-            for img in soup.find_all('img'):
-                src = img.get('src', '')
-                if not src or src.strip() == '':
-                    if post_path.name not in [p['file'] for p in results['posts_with_broken_img_tags']]:
-                        results['posts_with_broken_img_tags'].append({
-                            'file': post_path.name,
-                            'issue': 'Empty src attribute'
-                        })
-
+            findings = [finding for check in (AUDIT_PASSES if passes is None else passes)
+                        for finding in check(doc)]
         except Exception as e:
-            print(f"Error processing {post_path.name}: {e}")
+            print(f"Error processing {doc.name}: {e}")
+            continue
+        for category, finding in findings:
+            results.setdefault(category, []).append(finding)
 
+    print(f"Audited {len(docs)} posts, {len(changed)} re-indexed")
     return results
 
+REPORTED_CATEGORIES = {
+    'empty_posts', 'minimal_content_posts', 'posts_with_missing_images', 'posts_with_broken_img_tags',
+}
+
 def print_report(results):
     """Print audit report."""
     print("=" * 60)
@@ -148,6 +181,14 @@ def print_report(results):
     for post in results['posts_with_broken_img_tags']:
         print(f"  - {post['file']}: {post['issue']}")
 
+    # Categories added by other passes
+    for category, findings in results.items():
+        if category in REPORTED_CATEGORIES or not isinstance(findings, list):
+            continue
+        print(f"\n--- {category.replace('_', ' ').capitalize()} ({len(findings)}) ---")
+        for finding in findings:
+            print(f"  - {finding['file']}")
+
     print("\n" + "=" * 60)
 
     # Save detailed report as JSON
@@ -157,5 +198,11 @@ def print_report(results):
     print(f"\nDetailed report saved to: {report_path}")
 
 if __name__ == '__main__':
-    results = audit_posts()
+    import argparse
+    parser = argparse.ArgumentParser(description="Audit blog posts for empty content and broken images.")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for re-indexing changed posts")
+    args = parser.parse_args()
+
+    results = audit_posts(jobs=args.jobs)
     print_report(results)
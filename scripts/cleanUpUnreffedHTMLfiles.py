@@ -1,47 +1,54 @@
 import os
-from bs4 import BeautifulSoup
+from link_graph import LinkGraph, extract_links
 
 def extract_referenced_html_files(file_path):
-    referenced_files = set()
-    with open(file_path, 'r', encoding='utf-8') as file:
-        soup = BeautifulSoup(file, 'html.parser')
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if href.endswith('.html'):
-                # Resolve relative paths
-                referenced_file = os.path.normpath(os.path.join(os.path.dirname(file_path), href))
-                referenced_files.add(referenced_file)
-    return referenced_files
-
-def check_html_references(html_files_list, search_folder):
-    for file in os.listdir(search_folder):
-        if file.endswith(".html"):
-            file_path = os.path.join(search_folder, file)
-            is_referenced = False
-            for html_file in html_files_list:
-                referenced_files = extract_referenced_html_files(html_file)
-                if file_path in referenced_files:
-                    is_referenced = True
-                    break
-            if not is_referenced:
-                print(f"File {file} not referenced in any of the html files")
+    return {target for target in extract_links(file_path) if target.endswith('.html')}
+
+def list_html_files(folder):
+    # List all HTML files in folder without going recursive into folders
+    return [os.path.join(folder, file) for file in sorted(os.listdir(folder)) if file.endswith(".html")]
+
+def check_html_references(html_files_list, search_folder, graph=None):
+    # Every file is parsed once; references are looked up in the graph's inverted index
+    search_files = list_html_files(search_folder)
+    if graph is None:
+        graph = LinkGraph.build(html_files_list)
+    for file_path in graph.orphans(search_files, sources=html_files_list):
+        print(f"File {os.path.basename(file_path)} not referenced in any of the html files")
+
+def check_reachability(graph, start, search_folder):
+    reachable = graph.reachable(start)
+    for file_path in list_html_files(search_folder):
+        if file_path not in reachable:
+            print(f"File {os.path.basename(file_path)} not reachable from {os.path.basename(start)}")
+
+def check_dangling_links(graph):
+    for source, targets in sorted(graph.dangling().items()):
+        for target in targets:
+            print(f"File {source} links to missing file {target}")
 
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) != 3:
-        print("Usage: python cleanUpUnreffedHTMLfiles.py <root_folder> <search_folder>")
-        sys.exit(1)
-    root_folder = sys.argv[1]
-    search_folder = sys.argv[2]
+    import argparse
+    parser = argparse.ArgumentParser(description="Find HTML files in search_folder that the root pages do not link to.")
+    parser.add_argument('root_folder')
+    parser.add_argument('search_folder')
+    parser.add_argument('--unreachable', action='store_true',
+                        help="Also list search_folder files not reachable by links from root_folder/index.html")
+    parser.add_argument('--dangling', action='store_true',
+                        help="Also list links to local files that do not exist")
+    args = parser.parse_args()
 
     # Convert relative paths to absolute paths
-    root_folder = os.path.abspath(root_folder)
-    search_folder = os.path.abspath(search_folder)
+    root_folder = os.path.abspath(args.root_folder)
+    search_folder = os.path.abspath(args.search_folder)
+
+    html_files_list = list_html_files(root_folder)
 
-    # List all HTML files in root_folder without going recursive into folders
-    html_files_list = []
-    for file in os.listdir(root_folder):
-        if file.endswith(".html"):
-            html_files_list.append(os.path.join(root_folder, file))
+    # Parse the root pages and the searched files once, all into one graph
+    graph = LinkGraph.build(html_files_list + list_html_files(search_folder), root_folder)
 
-    check_html_references(html_files_list, search_folder)
\ No newline at end of file
+    check_html_references(html_files_list, search_folder, graph)
+    if args.unreachable:
+        check_reachability(graph, os.path.join(root_folder, 'index.html'), search_folder)
+    if args.dangling:
+        check_dangling_links(graph)
@@ -1,14 +1,24 @@
+import hashlib
+import json
 import os
+import time
 import xml.etree.ElementTree as ET
 from bs4 import BeautifulSoup
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 import re
+from post_index import load_index, save_index
+from site_templates import load_templates
+import update_blog_page
 
 # Define paths
 export_file = 'gcmoulicom.WordPress.2024-07-05.xml'  # Replace with the path to your XML export file
 output_path = './'
 posts_path = os.path.join(output_path, 'posts')
 media_path = os.path.join(output_path, 'media')
+manifest_path = os.path.join(output_path, '.import-manifest.json')
+ledger_path = os.path.join(output_path, '.post-index.json')
 
 # Create output directories if they don't exist
 os.makedirs(output_path, exist_ok=True)
@@ -43,276 +53,372 @@ def clean_filename(title, existing_filenames):
     existing_filenames.add(filename)
     return filename
 
-def create_html_file(title, body_content, filename):
-    html_template = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <link rel="stylesheet" href="../styles.css">
-</head>
-<body>
-    <div class="container">
-        <header>
-            <h1><a href="../index.html">GC Mouli's Blog</a></h1>
-            <nav>
-                <ul>
-                    <li><a href="../index.html">Home</a></li>
-                    <li><a href="../blog.html">Blog</a></li>
-                    <li><a href="../sonofcauvery.html">Son of Cauvery</a></li>
-                </ul>
-            </nav>
-        </header>
-        <main>
-            <h1>{title}</h1>
-            {body_content}
-        </main>
-        <footer>
-            <p>&copy; 2024 Mouli Gopalakrishnan</p>
-        </footer>
-    </div>
-</body>
-</html>
-"""
+def render_html_file(title, body_content):
+    main = f"""            <h1>{title}</h1>
+            {body_content}"""
+    return load_templates().page(title, main, root='../')
+
+def write_html_file(html, filename):
     with open(os.path.join(posts_path, filename), 'w', encoding='utf-8') as f:
-        f.write(html_template.strip())
+        f.write(html)
 
-def process_posts(root):
-    if root is None:
-        print("No XML root found. Exiting.")
-        return
+def create_html_file(title, body_content, filename):
+    write_html_file(render_html_file(title, body_content), filename)
 
-    posts_by_date = {}
-    existing_filenames = set()
-    
-    for item in root.findall('.//item'):
-        title = item.find('title').text if item.find('title') is not None else 'Untitled'
-        content = item.find('{http://purl.org/rss/1.0/modules/content/}encoded')
-        content = content.text if content is not None else None
-        pub_date = item.find('pubDate').text if item.find('pubDate') is not None else None
-
-        if content is None or pub_date is None:
-            print(f"Skipping post '{title}' because it has no content or publication date.")
+CONTENT_TAG = '{http://purl.org/rss/1.0/modules/content/}encoded'
+
+def read_item(item):
+    title = item.find('title').text if item.find('title') is not None else 'Untitled'
+    content = item.find(CONTENT_TAG)
+    content = content.text if content is not None else None
+    pub_date = item.find('pubDate').text if item.find('pubDate') is not None else None
+    return title, content, pub_date
+
+def iter_export_items(file_path):
+    # Incrementally parse the export, yielding one <item> at a time. Each item
+    # is cleared and detached from its parent once the caller is done with it,
+    # so memory stays flat no matter how large the export is.
+    parents = []
+    for event, elem in ET.iterparse(file_path, events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag != 'item':
             continue
+        yield elem
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
 
-        print(f"Processing post: {title}")
+def load_manifest(file_path):
+    # The import manifest maps each WordPress post to its output file and a
+    # digest of the inputs it was rendered from.
+    if not os.path.exists(file_path):
+        return {'posts': {}}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
-        # Format publication date
-        pub_date_parsed = datetime.strptime(pub_date, '%a, %d %b %Y %H:%M:%S %z')
-        year_month = pub_date_parsed.strftime('%Y-%m')
-        year = pub_date_parsed.strftime('%Y')
-        date_str = pub_date_parsed.strftime('%d %b %Y')
+def save_manifest(manifest, file_path):
+    tmp_path = file_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, file_path)
 
-        if year not in posts_by_date:
-            posts_by_date[year] = []
+def item_key(item, title, pub_date):
+    # Prefer the WordPress post ID, then the guid; whatever export namespace
+    # version is in use, the post_id element ends in '}post_id'.
+    for child in item:
+        if isinstance(child.tag, str) and child.tag.endswith('}post_id') and child.text:
+            return f"post_id:{child.text.strip()}"
+    guid = item.find('guid')
+    if guid is not None and guid.text:
+        return f"guid:{guid.text.strip()}"
+    return f"title:{title}|{pub_date}"
+
+def content_digest(title, content, pub_date):
+    return hashlib.sha256('\0'.join((title, pub_date, content)).encode('utf-8')).hexdigest()
+
+def prepare_item(item, existing_filenames, manifest=None):
+    # Runs on the parsing side: filenames are handed out here, in export order,
+    # so they come out the same no matter how many render workers there are.
+    title, content, pub_date = read_item(item)
+
+    if content is None or pub_date is None:
+        print(f"Skipping post '{title}' because it has no content or publication date.")
+        return None
 
-        # Use BeautifulSoup to prettify the content
-        soup = BeautifulSoup(content, 'html.parser')
-        body_content = soup.prettify()
+    key = item_key(item, title, pub_date)
+    entry = manifest['posts'].get(key) if manifest is not None else None
 
-        # Create clean filename
+    # Reuse the filename from a previous import, otherwise create a clean one
+    if entry is not None:
+        filename = entry['filename']
+    else:
         filename = clean_filename(title, existing_filenames)
-        create_html_file(title, body_content, filename)
+    return key, (title, content, pub_date, filename)
 
-        # Add post to the list for the month and year
-        posts_by_date[year].append((pub_date_parsed, date_str, title, filename))
+PUB_DATE_FORMAT = '%a, %d %b %Y %H:%M:%S %z'
 
+def index_row(title, pub_date, filename):
+    # Format publication date
+    pub_date_parsed = datetime.strptime(pub_date, PUB_DATE_FORMAT)
+    date_str = pub_date_parsed.strftime('%d %b %Y')
+    return pub_date_parsed, date_str, title, filename
+
+def manifest_row(entry):
+    # The year page row of a post known from an earlier import. Manifests
+    # written before title and pub_date were recorded fall back to the post
+    # ledger; returns None when neither knows the post's date.
+    if entry.get('pub_date'):
+        return index_row(entry['title'], entry['pub_date'], entry['filename'])
+    ledger = load_index(ledger_path) or {'posts': {}}
+    known = ledger['posts'].get(entry['filename'], {})
+    if not known.get('date'):
+        return None
+    published = datetime.strptime(known['date'], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    return published, published.strftime('%d %b %Y'), known.get('label') or known['title'], entry['filename']
+
+def render_post(work):
+    # Runs in a worker: returns the rendered page plus its blog index row
+    title, content, pub_date, filename = work
+
+    # Use BeautifulSoup to prettify the content
+    soup = BeautifulSoup(content, 'html.parser')
+    body_content = soup.prettify()
+
+    html = render_html_file(title, body_content)
+    return html, index_row(title, pub_date, filename)
+
+def sort_posts_by_date(posts_by_date):
     # Sort posts in reverse chronological order
     for year in posts_by_date:
         posts_by_date[year].sort(reverse=True, key=lambda x: x[0])
-
     return posts_by_date
 
+def render_posts(items, jobs=1, manifest=None, changed_years=None, prune=False):
+    """Render every post from items; returns posts grouped by year.
+
+    With a manifest, posts whose digest and output file are unchanged are
+    not re-rendered, the manifest is updated in place, and the years whose
+    post lists changed are added to changed_years.
+
+    Posts in the manifest but not in items are only listed, and stay on
+    their year pages, since the export may be partial or filtered. With
+    prune, their pages are deleted and they leave the manifest.
+    """
+    posts_by_date = {}
+    existing_filenames = set()
+    seen_keys = set()
+    rendered = 0
+    unchanged = 0
+    started = time.perf_counter()
+
+    if manifest is not None:
+        # Reserve every known filename up front so a new post can never
+        # take the name of one that appears later in the export.
+        existing_filenames.update(entry['filename'] for entry in manifest['posts'].values())
+
+    def add_row(row):
+        # Add post to the list for the year
+        posts_by_date.setdefault(row[0].strftime('%Y'), []).append(row)
+
+    def collect(key, digest, result):
+        html, row = result
+        write_html_file(html, row[3])
+        add_row(row)
+        if manifest is not None:
+            year = row[0].strftime('%Y')
+            previous = manifest['posts'].get(key)
+            if previous is not None and changed_years is not None:
+                changed_years.add(previous['year'])
+            if changed_years is not None:
+                changed_years.add(year)
+            manifest['posts'][key] = {'filename': row[3], 'digest': digest, 'year': year,
+                                      'title': row[2], 'pub_date': row[0].strftime(PUB_DATE_FORMAT)}
+
+    def is_unchanged(key, digest, filename):
+        if manifest is None:
+            return False
+        entry = manifest['posts'].get(key)
+        return (entry is not None and entry['digest'] == digest
+                and os.path.exists(os.path.join(posts_path, filename)))
+
+    def iter_work():
+        nonlocal unchanged
+        for item in items:
+            prepared = prepare_item(item, existing_filenames, manifest)
+            if prepared is None:
+                continue
+            key, work = prepared
+            if key in seen_keys:
+                print(f"Duplicate post '{work[0]}' ({key}) in export; keeping the first.")
+                continue
+            seen_keys.add(key)
+            title, content, pub_date, filename = work
+            digest = content_digest(title, content, pub_date)
+            if is_unchanged(key, digest, filename):
+                add_row(index_row(title, pub_date, filename))
+                manifest['posts'][key].update(title=title, pub_date=pub_date)
+                unchanged += 1
+                continue
+            print(f"Processing post: {title}")
+            yield key, digest, work
+
+    if jobs <= 1:
+        for key, digest, work in iter_work():
+            collect(key, digest, render_post(work))
+            rendered += 1
+    else:
+        # Keep a bounded number of posts in flight so a streamed export
+        # never piles up in the submission queue.
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            pending = deque()
+            for key, digest, work in iter_work():
+                pending.append((key, digest, pool.submit(render_post, work)))
+                if len(pending) >= jobs * 4:
+                    key, digest, future = pending.popleft()
+                    collect(key, digest, future.result())
+                    rendered += 1
+            while pending:
+                key, digest, future = pending.popleft()
+                collect(key, digest, future.result())
+                rendered += 1
+
+    if manifest is not None:
+        missing = sorted(set(manifest['posts']) - seen_keys, key=lambda key: manifest['posts'][key]['filename'])
+        for key in missing:
+            entry = manifest['posts'][key]
+            if prune:
+                # The post loses its page and drops out of its year page
+                del manifest['posts'][key]
+                post_file = os.path.join(posts_path, entry['filename'])
+                if os.path.exists(post_file):
+                    os.remove(post_file)
+                print(f"Post {entry['filename']} is no longer in the export; removed it")
+                if changed_years is not None:
+                    changed_years.add(entry['year'])
+                continue
+            row = manifest_row(entry)
+            if row is not None:
+                add_row(row)
+        if missing and not prune:
+            print(f"{len(missing)} imported posts are not in this export; "
+                  f"run with --prune to remove their pages:")
+            for key in missing:
+                print(f"  posts/{manifest['posts'][key]['filename']}")
+
+    elapsed = time.perf_counter() - started
+    rate = rendered / elapsed if elapsed > 0 else 0.0
+    print(f"Rendered {rendered} posts in {elapsed:.2f}s ({rate:.1f} posts/second, {jobs} job(s))")
+    if unchanged:
+        print(f"Skipped {unchanged} unchanged posts")
+    return sort_posts_by_date(posts_by_date)
+
+def process_posts(root, jobs=1, manifest=None, changed_years=None, prune=False):
+    if root is None:
+        print("No XML root found. Exiting.")
+        return
+
+    return render_posts(root.findall('.//item'), jobs, manifest, changed_years, prune)
+
+def process_posts_streaming(file_path, jobs=1, manifest=None, changed_years=None, prune=False):
+    try:
+        return render_posts(iter_export_items(file_path), jobs, manifest, changed_years, prune)
+    except ET.ParseError as e:
+        print(f"Failed to parse XML file: {e}")
+        return None
+
 def generate_year_page(year, posts):
-    year_content = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Posts from {year}</title>
-    <link rel="stylesheet" href="styles.css">
-</head>
-<body>
-    <div class="container">
-        <header>
-            <h1><a href="index.html">GC Mouli's Blog</a></h1>
-            <nav>
-                <ul>
-                    <li><a href="index.html">Home</a></li>
-                    <li><a href="blog.html">Blog</a></li>
-                    <li><a href="sonofcauvery.html">Son of Cauvery</a></li>
-                </ul>
-            </nav>
-        </header>
-        <main>
-            <h2>Posts from {year}</h2>
+    year_content = f"""            <h2>Posts from {year}</h2>
             <ul>
 """
     for _, date_str, title, filename in posts:
         year_content += f'                <li><a href="posts/{filename}">{date_str} - {title}</a></li>\n'
-
-    year_content += """
-            </ul>
-        </main>
-        <footer>
-            <p>&copy; 2024 Mouli Gopalakrishnan</p>
-        </footer>
-    </div>
-</body>
-</html>
-"""
+    year_content += "            </ul>"
 
     with open(os.path.join(output_path, f'{year}.html'), 'w', encoding='utf-8') as f:
-        f.write(year_content.strip())
-
-def generate_blog_page(posts_by_date):
-    blog_content = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>My Blog</title>
-    <link rel="stylesheet" href="styles.css">
-</head>
-<body>
-    <div class="container">
-        <header>
-            <h1>GC Mouli's Blog</h1>
-            <nav>
-                <ul>
-                    <li><a href="index.html">Home</a></li>
-                    <li><a href="blog.html">Blog</a></li>
-                    <li><a href="sonofcauvery.html">Son of Cauvery</a></li>
-                </ul>
-            </nav>
-        </header>
-        <main>
-            <div class="content">
-                <section>
-"""
-    years = sorted(posts_by_date.keys(), reverse=True)
-
-    for year in years:
-        blog_content += f'                    <h2>{year}</h2>\n                    <ul>\n'
-        for _, date_str, title, filename in posts_by_date[year][:5]:  # Display top 5 posts of the year on blog page
-            blog_content += f'                        <li><a href="posts/{filename}">{date_str} - {title}</a></li>\n'
-        blog_content += f'                    </ul>\n                    <a href="{year}.html">See all posts from {year}</a>\n'
-    
-    blog_content += """
-                </section>
-                <aside>
-                    <h3>Archives</h3>
-                    <ul>
-"""
-    for year in years:
-        blog_content += f'                        <li><a href="{year}.html">{year}</a></li>\n'
-
-    blog_content += """
-                    </ul>
-                </aside>
-            </div>
-        </main>
-        <footer>
-            <p>&copy; 2024 Mouli Gopalakrishnan</p>
-        </footer>
-    </div>
-</body>
-</html>
-"""
-    with open(os.path.join(output_path, 'blog.html'), 'w', encoding='utf-8') as f:
-        f.write(blog_content.strip())
+        f.write(load_templates().page(f"Posts from {year}", year_content))
 
-    # Generate yearly pages
+def generate_year_pages(posts_by_date, changed_years=None):
+    # With changed_years, only the listed year pages are rewritten, and
+    # nothing at all when no year changed.
+    if changed_years is not None and not changed_years:
+        print("No year archives changed; leaving year pages as they are.")
+        return
     for year, posts in posts_by_date.items():
-        generate_year_page(year, posts)
+        if changed_years is None or year in changed_years:
+            generate_year_page(year, posts)
+
+def record_post_dates(posts_by_date):
+    # The site index, which blog.html is built from, dates posts from the
+    # post ledger. Imported posts carry no post-meta, so posts the ledger has
+    # no date for get their publication date; dates already there are kept.
+    ledger = load_index(ledger_path) or {'posts': {}, 'years': {}}
+    changed = False
+    for posts in posts_by_date.values():
+        for pub_date, _, title, filename in posts:
+            entry = ledger['posts'].setdefault(filename, {'title': title})
+            if entry.get('date') is None:
+                entry.update(date=pub_date.strftime('%Y-%m-%d'), year=pub_date.year)
+                changed = True
+    if changed:
+        save_index(ledger, ledger_path)
+
+def remove_empty_year_pages(years, posts_by_date):
+    # Years that had imported posts before this run and have none now. Their
+    # archive page goes, unless it still lists posts that were not imported.
+    for year in sorted(set(years) - set(posts_by_date)):
+        year_file = os.path.join(output_path, f'{year}.html')
+        if not os.path.exists(year_file):
+            continue
+        with open(year_file, 'r', encoding='utf-8') as f:
+            listed = re.findall(r'href="posts/([^"]+)"', f.read())
+        if any(os.path.exists(os.path.join(posts_path, name)) for name in listed):
+            print(f"{year}.html has no imported posts left but lists other posts; keeping it")
+            continue
+        os.remove(year_file)
+        print(f"Removed {year}.html: no posts left in {year}")
 
 def generate_index_page():
-    index_content = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>GC Mouli</title>
-    <link rel="stylesheet" href="styles.css">
-</head>
-<body>
-    <div class="container">
-        <header>
-            <h1>GC Mouli's Blog</h1>
-            <nav>
-                <ul>
-                    <li><a href="index.html">Home</a></li>
-                    <li><a href="blog.html">Blog</a></li>
-                    <li><a href="sonofcauvery.html">Son of Cauvery</a></li>
-                </ul>
-            </nav>
-        </header>
-        <main>
-            <h2>About Me</h2>
+    index_content = """            <h2>About Me</h2>
             <p>Hello! I'm GC Mouli. I work in the tech industry and have a passion for writing and sharing knowledge.</p>
             <p>You can find me on Twitter and LinkedIn:</p>
             <ul>
                 <li><a href="https://twitter.com/your_twitter_handle">Twitter</a></li>
                 <li><a href="https://linkedin.com/in/your_linkedin_handle">LinkedIn</a></li>
-            </ul>
-        </main>
-        <footer>
-            <p>&copy; 2024 Mouli Gopalakrishnan</p>
-        </footer>
-    </div>
-</body>
-</html>
-"""
+            </ul>"""
     with open(os.path.join(output_path, 'index.html'), 'w', encoding='utf-8') as f:
-        f.write(index_content.strip())
+        f.write(load_templates().page("GC Mouli", index_content))
 
 def generate_son_of_cauvery_page():
-    sonofcauvery_content = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Son of Cauvery</title>
-    <link rel="stylesheet" href="styles.css">
-</head>
-<body>
-    <div class="container">
-        <header>
-            <h1>GC Mouli's Blog</h1>
-            <nav>
-                <ul>
-                    <li><a href="index.html">Home</a></li>
-                    <li><a href="blog.html">Blog</a></li>
-                    <li><a href="sonofcauvery.html">Son of Cauvery</a></li>
-                </ul>
-            </nav>
-        </header>
-        <main>
-            <h2>Son of Cauvery</h2>
+    sonofcauvery_content = """            <h2>Son of Cauvery</h2>
             <p>I am working on an English retelling of the Tamil epic novel Ponniyin Selvan, titled "Son of Cauvery".</p>
-            <p>The story follows the early life of Arulmozhivarman, who later becomes the great Chola emperor Rajaraja Chola I.</p>
-        </main>
-        <footer>
-            <p>&copy; 2024 Mouli Gopalakrishnan</p>
-        </footer>
-    </div>
-</body>
-</html>
-"""
+            <p>The story follows the early life of Arulmozhivarman, who later becomes the great Chola emperor Rajaraja Chola I.</p>"""
     with open(os.path.join(output_path, 'sonofcauvery.html'), 'w', encoding='utf-8') as f:
-        f.write(sonofcauvery_content.strip())
+        f.write(load_templates().page("Son of Cauvery", sonofcauvery_content))
 
 if __name__ == "__main__":
-    root = parse_export_file(export_file)
-    posts_by_date = process_posts(root)
-    generate_blog_page(posts_by_date)
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert a WordPress export into the static blog.")
+    parser.add_argument('export_file', nargs='?', default=export_file,
+                        help="Path to the WordPress XML export")
+    parser.add_argument('--stream', action='store_true',
+                        help="Parse the export incrementally, one <item> at a time")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes rendering posts (1 renders inline)")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-render every post even if the import manifest says it is unchanged")
+    parser.add_argument('--prune', action='store_true',
+                        help="Delete the pages of imported posts that are no longer in the export "
+                             "(by default they are only listed)")
+    args = parser.parse_args()
+
+    manifest = load_manifest(manifest_path)
+    previous_years = {entry['year'] for entry in manifest['posts'].values()}
+    if args.force:
+        # Keep the filenames, forget the digests
+        for entry in manifest['posts'].values():
+            entry['digest'] = None
+        changed_years = None
+    else:
+        changed_years = set()
+
+    if args.stream:
+        posts_by_date = process_posts_streaming(args.export_file, args.jobs, manifest, changed_years, args.prune)
+    else:
+        root = parse_export_file(args.export_file)
+        posts_by_date = process_posts(root, args.jobs, manifest, changed_years, args.prune)
+    if posts_by_date is None:
+        raise SystemExit(1)
+    save_manifest(manifest, manifest_path)
+    generate_year_pages(posts_by_date, changed_years)
+    if args.prune:
+        remove_empty_year_pages(previous_years, posts_by_date)
+    record_post_dates(posts_by_date)
+    # blog.html and its pages come from the site index, like any other run
+    # of update_blog_page.py
+    update_blog_page.main(jobs=args.jobs)
     generate_index_page()
     generate_son_of_cauvery_page()
     print("Static HTML site generated successfully.")
-
@@ -1,12 +1,34 @@
+import base64
+import hashlib
+import json
 import os
+import re
+import shutil
+import threading
+import time
 import requests
 import xml.etree.ElementTree as ET
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlparse
+from unreachable_assets import find_unreachable_assets
 
 # Define paths
 export_file = 'gcmoulicom.WordPress.2024-07-05.xml'  # Replace with the path to your XML export file
 media_output_path = 'media'
+manifest_path = '.media-manifest.json'
+posts_path = 'posts'
+
+# Download tuning
+DEFAULT_JOBS = 8
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds
+DEFAULT_RETRIES = 3
+RETRY_BACKOFF = 0.5  # seconds, doubled on every retry
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHUNK_SIZE = 64 * 1024
+# An ETag that is a bare MD5 of the body, as S3-style servers send
+MD5_ETAG_RE = re.compile(r'^"?([0-9a-fA-F]{32})"?$')
 
 # Create media output directory if it doesn't exist
 if not os.path.exists(media_output_path):
@@ -33,26 +55,333 @@ def extract_media_urls(content):
 
     return media_urls
 
-def download_media(url, save_directory):
+def make_session(pool_size):
+    # One keep-alive connection pool per host, sized to the number of workers
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def load_manifest(file_path):
+    # The media manifest records, per URL, the local file plus the size,
+    # digest and HTTP validators it was saved with.
+    if not os.path.exists(file_path):
+        return {'media': {}}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest, file_path):
+    tmp_path = file_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, file_path)
+
+def file_digest(file_path, digest=None):
+    digest = digest or hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest
+
+def asset_name(digest, filename):
+    # Stored media is named by content, keeping the original extension
+    return digest[:16] + os.path.splitext(filename)[1].lower()
+
+def store_asset(src_path, asset_path, keep_src=False):
+    # Identical content already stored under this name is simply reused
+    if os.path.exists(asset_path):
+        if not keep_src:
+            os.remove(src_path)
+    elif keep_src:
+        try:
+            os.link(src_path, asset_path)
+        except OSError:
+            shutil.copyfile(src_path, asset_path)
+    else:
+        os.replace(src_path, asset_path)
+
+def remote_md5(session, url, timeout=DEFAULT_TIMEOUT):
+    # MD5 of url's body from a HEAD request, taken from Content-MD5 or an
+    # ETag that is a plain MD5; None if the server sends neither
     try:
-        response = requests.get(url, stream=True)
+        response = session.head(url, timeout=timeout, allow_redirects=True)
         response.raise_for_status()
-        parsed_url = urlparse(url)
-        filename = os.path.basename(parsed_url.path)
-        filepath = os.path.join(save_directory, filename)
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(1024):
-                f.write(chunk)
-        return filename
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to download {url}: {e}")
+    except requests.exceptions.RequestException:
+        return None
+    content_md5 = response.headers.get('Content-MD5')
+    if content_md5:
+        try:
+            return base64.b64decode(content_md5, validate=True).hex()
+        except ValueError:
+            pass
+    # Weak ETags do not promise identical bytes
+    match = MD5_ETAG_RE.match(response.headers.get('ETag', ''))
+    return match.group(1).lower() if match else None
+
+def adopt_legacy_file(save_directory, filename, expected_md5):
+    """Move a file saved under its URL basename into the content store.
+
+    URLs that share a basename can be different images, even of the same
+    size, so the file is only adopted when its MD5 is the remote's
+    expected_md5. Without one, download_media() fetches the URL and
+    compares digests instead. The original name is hard-linked rather than
+    moved, so posts keep working until rewrite_posts() points them at the
+    asset.
+    """
+    legacy_path = os.path.join(save_directory, filename)
+    if not filename or expected_md5 is None or not os.path.isfile(legacy_path):
+        return None
+    if file_digest(legacy_path, hashlib.md5()).hexdigest() != expected_md5:
         return None
+    digest = file_digest(legacy_path).hexdigest()
+    asset = asset_name(digest, filename)
+    if asset != filename:
+        store_asset(legacy_path, os.path.join(save_directory, asset), keep_src=True)
+    return {'asset': asset, 'size': os.path.getsize(legacy_path), 'sha256': digest, 'adopted': 'md5'}
+
+def request_headers(entry, tmp_path, conditional):
+    """Pick conditional or range headers for the next request.
+
+    Returns (headers, offset) where offset is how many bytes of the .part
+    file the response is expected to continue from.
+    """
+    validator = entry.get('etag') or entry.get('last_modified')
+    if conditional:
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers, 0
+    if os.path.exists(tmp_path) and validator:
+        offset = os.path.getsize(tmp_path)
+        if offset:
+            return {'Range': f'bytes={offset}-', 'If-Range': validator}, offset
+    return {}, 0
+
+def download_media(url, save_directory, session=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                   entry=None, revalidate=False):
+    """Bring the stored copy of url up to date.
+
+    Media is stored under its content hash (see asset_name()), so the same
+    bytes fetched from different URLs are kept once. Assets already in the
+    store are skipped, or revalidated with a conditional GET when revalidate
+    is set; an interrupted download resumes from its .part file. Returns
+    (entry, transferred): the updated manifest entry, whose 'complete' flag
+    is False if the download failed, and the number of body bytes received.
+    """
+    session = session or requests
+    parsed_url = urlparse(url)
+    filename = os.path.basename(parsed_url.path)
+    # Stage under a name unique to the URL, so URLs sharing a basename
+    # cannot clobber each other mid-download
+    url_key = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    tmp_path = os.path.join(save_directory, f'.{url_key}.part')
+    entry = dict(entry or {}, filename=filename)
+    if entry.pop('variant_of', None) or entry.get('adopted') is True:
+        # Older runs pointed size variants at their full-size original, and
+        # adopted legacy files by size alone; those URLs are synced again
+        entry = {'filename': filename}
+    transferred = 0
+
+    asset_path = os.path.join(save_directory, entry['asset']) if entry.get('asset') else None
+    have_asset = asset_path is not None and os.path.exists(asset_path)
+    if have_asset and os.path.getsize(asset_path) != entry.get('size'):
+        # The stored copy no longer matches what was downloaded
+        have_asset, entry = False, {'filename': filename}
+    elif not have_asset and entry.get('asset'):
+        entry = {'filename': filename}
+    conditional = have_asset and revalidate and bool(entry.get('etag') or entry.get('last_modified'))
+
+    if have_asset and not conditional:
+        entry['complete'] = True
+        return entry, transferred
+    legacy_path = os.path.join(save_directory, filename) if filename else None
+    check_legacy = not have_asset and legacy_path is not None and os.path.isfile(legacy_path)
+    if check_legacy and not revalidate:
+        adopted = adopt_legacy_file(save_directory, filename, remote_md5(session, url, timeout))
+        if adopted is not None:
+            entry.update(adopted, complete=True)
+            return entry, transferred
+
+    attempt = 0
+    while True:
+        headers, offset = request_headers(entry, tmp_path, conditional)
+        try:
+            with session.get(url, stream=True, timeout=timeout, headers=headers) as response:
+                if response.status_code == 304:
+                    entry['complete'] = True
+                    return entry, transferred
+                if response.status_code == 416 and offset:
+                    # The partial file is not a prefix of what the server has
+                    os.remove(tmp_path)
+                    continue
+                response.raise_for_status()
+                if response.status_code != 206:
+                    offset = 0
+                entry['etag'] = response.headers.get('ETag')
+                entry['last_modified'] = response.headers.get('Last-Modified')
+                digest = file_digest(tmp_path) if offset else hashlib.sha256()
+                with open(tmp_path, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        transferred += len(chunk)
+            size = os.path.getsize(tmp_path)
+            asset = asset_name(digest.hexdigest(), filename)
+            store_asset(tmp_path, os.path.join(save_directory, asset))
+            entry.update(asset=asset, size=size, sha256=digest.hexdigest(), complete=True)
+            entry.pop('adopted', None)
+            if check_legacy and os.path.getsize(legacy_path) == size \
+                    and file_digest(legacy_path).hexdigest() == entry['sha256']:
+                # The old basename copy holds these very bytes
+                entry['adopted'] = 'sha256'
+            return entry, transferred
+        except requests.exceptions.RequestException as e:
+            status = e.response.status_code if e.response is not None else None
+            retryable = status is None or status in RETRY_STATUSES
+            if not retryable or attempt == retries:
+                print(f"Failed to download {url}: {e}")
+                break
+            time.sleep(RETRY_BACKOFF * (2 ** attempt))
+            attempt += 1
+
+    # Keep the .part file so the next run can resume it
+    entry['complete'] = False
+    return entry, transferred
+
+def group_by_basename(urls):
+    # URLs sharing a basename share the legacy file they may adopt, so each
+    # group is synced in order by one worker rather than concurrently
+    groups = {}
+    for url in urls:
+        groups.setdefault(os.path.basename(urlparse(url).path), []).append(url)
+    return list(groups.values())
+
+def download_all(urls, save_directory, jobs=DEFAULT_JOBS, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES,
+                 manifest=None, revalidate=False):
+    """Sync urls into the store with at most `jobs` requests in flight.
 
-def process_posts(root):
+    Returns a dict mapping each URL to its manifest entry. When a manifest
+    is given, its entries are used to skip, revalidate or resume downloads
+    and are updated as each file completes. Each URL, WordPress size
+    variants included, gets its own asset unless its content is identical
+    to another's.
+    """
+    manifest = manifest if manifest is not None else {'media': {}}
+    sessions = {}
+    sessions_lock = threading.Lock()
+    results = {}
+
+    def session_for(url):
+        host = urlparse(url).netloc
+        with sessions_lock:
+            if host not in sessions:
+                sessions[host] = make_session(jobs)
+            return sessions[host]
+
+    def fetch(url):
+        entry, transferred = download_media(url, save_directory, session_for(url), timeout, retries,
+                                            manifest['media'].get(url), revalidate)
+        if transferred:
+            print(f"Downloaded media: {url} ({transferred} bytes)")
+        manifest['media'][url] = results[url] = entry
+        return transferred
+
+    def fetch_group(group):
+        return sum(fetch(url) for url in group)
+
+    # Preserve first-seen order while dropping duplicates
+    urls = list(dict.fromkeys(urls))
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            transferred = sum(pool.map(fetch_group, group_by_basename(urls)))
+    finally:
+        for session in sessions.values():
+            session.close()
+    print(f"Transferred {transferred} bytes")
+    return {url: results[url] for url in urls}
+
+def rewrite_posts(posts_directory, manifest, save_directory):
+    """Point posts at the stored assets.
+
+    References to each synced URL, and to the old basename copy of adopted
+    files, become ../media/<asset>. Old copies are left in place: pages
+    outside posts/ may still use them, so they are only removed by
+    remove_legacy_files(). Returns the number of posts rewritten.
+    """
+    media_prefix = '../' + os.path.basename(os.path.normpath(save_directory)) + '/'
+    replacements = {}
+    legacy_names = set()
+    for url, entry in manifest['media'].items():
+        if not entry.get('complete') or not entry.get('asset'):
+            continue
+        replacements[url] = media_prefix + entry['asset']
+        if entry.get('adopted') and entry['filename'] != entry['asset']:
+            replacements[media_prefix + entry['filename']] = media_prefix + entry['asset']
+            legacy_names.add(entry['filename'])
+    if not replacements:
+        return 0
+
+    # Longest first, so a URL is never cut short by one of its prefixes
+    pattern = re.compile('(?<=["\' ,])(' + '|'.join(
+        re.escape(key) for key in sorted(replacements, key=len, reverse=True)) + ')(?=["\' ,])')
+    rewritten = 0
+    for name in sorted(os.listdir(posts_directory)):
+        if not name.endswith('.html'):
+            continue
+        post_path = os.path.join(posts_directory, name)
+        with open(post_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        new_content = pattern.sub(lambda m: replacements[m.group(1)], content)
+        if new_content != content:
+            tmp_path = post_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(new_content)
+            os.replace(tmp_path, post_path)
+            rewritten += 1
+
+    if legacy_names:
+        print(f"{len(legacy_names)} media files were adopted under new names; "
+              f"--remove-legacy deletes the old copies nothing uses any more")
+    return rewritten
+
+def remove_legacy_files(manifest, save_directory):
+    """Delete the old basename copies of adopted files that no page uses.
+
+    Run after rewrite_posts(). Every page is crawled as unreachable_assets.py
+    does, and a copy is only deleted when the crawl never reaches it; the
+    content stays in the store under its asset name. Returns the number of
+    files removed.
+    """
+    save_directory = os.path.normpath(save_directory)
+    legacy_names = sorted({entry['filename'] for entry in manifest['media'].values()
+                           if entry.get('complete') and entry.get('adopted')
+                           and entry['filename'] != entry['asset']
+                           and os.path.isfile(os.path.join(save_directory, entry['filename']))})
+    if not legacy_names:
+        return 0
+    site_root = os.path.dirname(os.path.abspath(save_directory))
+    media_dir = os.path.basename(os.path.abspath(save_directory))
+    unreachable, _ = find_unreachable_assets(site_root, asset_dirs=[media_dir])
+    unreachable = set(unreachable)
+    removed = 0
+    for name in legacy_names:
+        if os.path.join(media_dir, name) in unreachable:
+            os.remove(os.path.join(save_directory, name))
+            removed += 1
+        else:
+            print(f"Keeping {os.path.join(media_dir, name)}: a page still uses it")
+    return removed
+
+def process_posts(root, jobs=DEFAULT_JOBS, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, revalidate=False,
+                  rewrite=False, remove_legacy=False):
     if root is None:
         print("No XML root found. Exiting.")
         return
-    
+
+    media_urls = []
     for item in root.findall('.//item'):
         title = item.find('title').text if item.find('title') is not None else 'Untitled'
         content = item.find('{http://purl.org/rss/1.0/modules/content/}encoded')
@@ -64,14 +393,53 @@ def process_posts(root):
         
         print(f"Processing post: {title}")
 
-        # Extract and download media
-        media_urls = extract_media_urls(content)
-        for url in media_urls:
-            print(f"Downloading media: {url}")
-            download_media(url, media_output_path)
+        # Extract media; downloads happen concurrently once all posts are read
+        media_urls.extend(extract_media_urls(content))
+
+    manifest = load_manifest(manifest_path)
+    started = time.perf_counter()
+    try:
+        results = download_all(media_urls, media_output_path, jobs, timeout, retries, manifest, revalidate)
+    finally:
+        save_manifest(manifest, manifest_path)
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for entry in results.values() if not entry['complete'])
+    print(f"Synced {len(results) - failed}/{len(results)} media files in {elapsed:.1f}s ({failed} failed)")
+    assets = {entry['asset']: entry['size'] for entry in results.values() if entry.get('asset')}
+    print(f"{len(assets)} unique assets, {sum(assets.values())} bytes")
+
+    if rewrite:
+        rewritten = rewrite_posts(posts_path, manifest, media_output_path)
+        print(f"Rewrote media references in {rewritten} posts")
+    if remove_legacy:
+        removed = remove_legacy_files(manifest, media_output_path)
+        print(f"Removed {removed} old copies of adopted media files")
+    return results
 
 if __name__ == "__main__":
-    root = parse_export_file(export_file)
-    process_posts(root)
+    import argparse
+    parser = argparse.ArgumentParser(description="Download the media referenced by a WordPress export.")
+    parser.add_argument('export_file', nargs='?', default=export_file,
+                        help="Path to the WordPress XML export")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help="Maximum number of concurrent downloads")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT[1],
+                        help="Read timeout per request, in seconds")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help="Retries per file for connection errors and 429/5xx responses")
+    parser.add_argument('--revalidate', action='store_true',
+                        help="Send conditional requests for files already on disk instead of skipping them")
+    parser.add_argument('--rewrite', action='store_true',
+                        help="Point posts at the stored assets")
+    parser.add_argument('--remove-legacy', action='store_true',
+                        help="After --rewrite, delete the old basename copies of adopted files "
+                             "that no page on the site uses")
+    args = parser.parse_args()
+    if args.remove_legacy and not args.rewrite:
+        parser.error("--remove-legacy needs --rewrite, so posts no longer use the old copies")
+
+    root = parse_export_file(args.export_file)
+    process_posts(root, args.jobs, (DEFAULT_TIMEOUT[0], args.timeout), args.retries, args.revalidate,
+                  args.rewrite, args.remove_legacy)
     print("Media download process completed.")
 
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Link graph for the static site.
+Parses each HTML file once and keeps both directions of every local link,
+so orphan, reachability and dangling-link questions are dictionary lookups
+instead of re-parsing the referring pages. Pages also record the files they
+embed (images, srcsets, stylesheets, scripts, CSS url()s), which lets crawl()
+walk the whole site from index.html.
+"""
+
+import os
+import re
+from collections import defaultdict, deque
+from urllib.parse import unquote, urlsplit
+from bs4 import BeautifulSoup
+
+# Attributes that embed another file, by tag (<a href> is tracked as a link)
+EMBED_ATTRS = {
+    'link': ('href',),
+    'img': ('src', 'srcset'),
+    'source': ('src', 'srcset'),
+    'script': ('src',),
+    'video': ('src', 'poster'),
+    'audio': ('src',),
+    'track': ('src',),
+    'iframe': ('src',),
+    'embed': ('src',),
+    'object': ('data',),
+}
+
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)(.*?)\1\s*\)|@import\s+(['"])(.*?)\3""")
+
+
+def resolve_reference(source_path, ref, site_root=None):
+    """Resolve a reference found in source_path to an absolute local path.
+
+    Root-relative references ("/media/x.jpg") resolve against site_root.
+    Returns None for external URLs, in-page anchors and non-file schemes.
+    """
+    ref = ref.strip()
+    if not ref or ref.startswith('#'):
+        return None
+    parts = urlsplit(ref)
+    if parts.scheme or parts.netloc:
+        return None
+    if not parts.path:
+        return None
+    base = os.path.dirname(source_path)
+    if parts.path.startswith('/'):
+        base = site_root or os.getcwd()
+    resolved = []
+    for path in (unquote(parts.path), parts.path):
+        path = path.lstrip('/') if parts.path.startswith('/') else path
+        if path.endswith('/') or not path:
+            path += 'index.html'
+        resolved.append(os.path.normpath(os.path.join(base, path)))
+    # Some files were saved with their URL escapes in the name
+    if not os.path.exists(resolved[0]) and os.path.exists(resolved[1]):
+        return resolved[1]
+    return resolved[0]
+
+
+def srcset_urls(srcset):
+    # "a.jpg 1x, b.jpg 2x" -> ["a.jpg", "b.jpg"]
+    return [candidate.split()[0] for candidate in srcset.split(',') if candidate.strip()]
+
+
+def css_urls(css):
+    return [match.group(2) or match.group(4) for match in CSS_URL_RE.finditer(css)]
+
+
+def extract_references(file_path, site_root=None):
+    """Return (links, embeds): local files that file_path links to and embeds.
+
+    HTML files are parsed once for both. CSS files only embed.
+    """
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read()
+
+    if file_path.endswith('.css'):
+        embeds = {resolve_reference(file_path, ref, site_root) for ref in css_urls(content)}
+        return set(), embeds - {None}
+
+    return soup_references(BeautifulSoup(content, 'html.parser'), file_path, site_root)
+
+
+def soup_references(soup, file_path, site_root=None):
+    """Return (links, embeds) for an HTML file that is already parsed."""
+    links, embeds = set(), set()
+
+    def add(targets, ref):
+        target = resolve_reference(file_path, ref, site_root)
+        if target:
+            targets.add(target)
+
+    for tag in soup.find_all(True):
+        if tag.name == 'a' and tag.get('href'):
+            add(links, tag['href'])
+        for attr in EMBED_ATTRS.get(tag.name, ()):
+            value = tag.get(attr)
+            if not value:
+                continue
+            for ref in (srcset_urls(value) if attr == 'srcset' else [value]):
+                add(embeds, ref)
+        if tag.get('style'):
+            for ref in css_urls(tag['style']):
+                add(embeds, ref)
+        if tag.name == 'style':
+            for ref in css_urls(tag.get_text()):
+                add(embeds, ref)
+    return links, embeds
+
+
+def extract_links(file_path):
+    """Return the set of local files that <a href> links in file_path point to."""
+    return extract_references(file_path)[0]
+
+
+class LinkGraph:
+    """Local links between HTML files, with an inverted index of targets."""
+
+    def __init__(self, site_root=None):
+        self.site_root = os.path.abspath(site_root) if site_root else None
+        self.outbound = {}
+        self.inbound = defaultdict(set)
+        self.embeds = {}
+
+    @classmethod
+    def build(cls, html_files, site_root=None):
+        graph = cls(site_root)
+        for file_path in html_files:
+            graph.add_file(file_path)
+        return graph
+
+    def add_file(self, file_path):
+        file_path = os.path.normpath(os.path.abspath(file_path))
+        if file_path in self.outbound:
+            return
+        targets, embeds = extract_references(file_path, self.site_root)
+        self.outbound[file_path] = targets
+        self.embeds[file_path] = embeds
+        for target in targets:
+            self.inbound[target].add(file_path)
+
+    def referrers(self, target):
+        """Files that link to target."""
+        return self.inbound.get(os.path.normpath(os.path.abspath(target)), set())
+
+    def orphans(self, candidates, sources=None):
+        """Candidates that no file links to (or none of sources, if given)."""
+        sources = None if sources is None else {os.path.normpath(os.path.abspath(s)) for s in sources}
+        orphaned = []
+        for candidate in candidates:
+            referrers = self.referrers(candidate)
+            if sources is not None:
+                referrers = referrers & sources
+            if not referrers:
+                orphaned.append(candidate)
+        return orphaned
+
+    def reachable(self, start):
+        """Every parsed file reachable by following links from start."""
+        start = os.path.normpath(os.path.abspath(start))
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            for target in self.outbound.get(queue.popleft(), ()):
+                if target not in seen:
+                    seen.add(target)
+                    queue.append(target)
+        return seen
+
+    def crawl(self, starts):
+        """Every file reachable from starts through links and embeds.
+
+        HTML pages and stylesheets reached for the first time are parsed and
+        added to the graph; other files are leaves.
+        """
+        starts = [os.path.normpath(os.path.abspath(start)) for start in starts]
+        seen = set(starts)
+        queue = deque(starts)
+        while queue:
+            file_path = queue.popleft()
+            if file_path not in self.outbound:
+                if not file_path.endswith(('.html', '.htm', '.css')) or not os.path.isfile(file_path):
+                    continue
+                self.add_file(file_path)
+            for target in self.outbound[file_path] | self.embeds[file_path]:
+                if target not in seen:
+                    seen.add(target)
+                    queue.append(target)
+        return seen
+
+    def dangling(self):
+        """Map each parsed file to the local targets it links to that do not exist."""
+        missing = {target for target in self.inbound if not os.path.exists(target)}
+        broken = {}
+        for source, targets in self.outbound.items():
+            if targets & missing:
+                broken[source] = sorted(targets & missing)
+        return broken
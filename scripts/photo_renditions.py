@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Card-sized renditions of the #DosaWithMouli photos.
+Each photo is turned upright from its EXIF orientation, cropped square the
+way its card shows it, and saved at CARD_WIDTHS as JPEG and WebP with no
+metadata, so no camera details or location are published. The renditions
+are recorded on the photo's entries in dosawithmouli-data.json, and
+build-dosawithmouli.py turns them into srcset.
+
+Pillow is optional: without it photos are used as uploaded.
+dwm-updater.py runs this on upload; for photos already in the data file:
+    python3 scripts/photo_renditions.py
+"""
+
+import json
+import os
+from pathlib import Path
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+WEB_DIR = Path(__file__).parent.parent
+DATA_FILE = WEB_DIR / "dosawithmouli-data.json"
+
+# Cards are about 300px wide on desktop and half the screen on phones
+CARD_WIDTHS = (320, 480, 640)
+FORMATS = {
+    'jpeg': ('.jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('.webp', {'quality': 80, 'method': 6}),
+}
+
+
+def available():
+    return Image is not None
+
+
+def rendition_path(photo, width, fmt):
+    """dosa-photos/name.jpg -> dosa-photos/name-320w.webp"""
+    return f"{os.path.splitext(photo)[0]}-{width}w{FORMATS[fmt][0]}"
+
+
+def make_renditions(photo, site_root=WEB_DIR):
+    """Write the renditions of photo (a site-relative path).
+
+    Returns the list to store as the entry's "renditions":
+    [{"width": 320, "jpeg": path, "webp": path}, ...], smallest first.
+    Photos are never upscaled: the widths the photo can fill are followed
+    by one rendition at its own size, so srcset still offers every pixel.
+    """
+    site_root = Path(site_root)
+    with Image.open(site_root / photo) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        side = min(image.size)
+        sizes = [width for width in CARD_WIDTHS if width <= side]
+        if len(sizes) < len(CARD_WIDTHS):
+            sizes.append(side)
+        renditions = []
+        for size in dict.fromkeys(sizes):
+            square = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            rendition = {'width': size}
+            for fmt, (ext, options) in FORMATS.items():
+                path = rendition_path(photo, size, fmt)
+                tmp_path = site_root / f"{path}.tmp"
+                square.save(tmp_path, format=fmt.upper(), **options)
+                os.replace(tmp_path, site_root / path)
+                rendition[fmt] = path
+            renditions.append(rendition)
+    return renditions
+
+
+def is_current(entry, site_root=WEB_DIR):
+    """True if the entry's renditions exist and are newer than its photo."""
+    renditions = entry.get('renditions')
+    if not renditions:
+        return False
+    site_root = Path(site_root)
+    photo_mtime = os.stat(site_root / entry['photo']).st_mtime_ns
+    for rendition in renditions:
+        for fmt in FORMATS:
+            path = site_root / rendition.get(fmt, '')
+            if not path.is_file() or path.stat().st_mtime_ns < photo_mtime:
+                return False
+    return True
+
+
+def apply_renditions(entries, photo, renditions):
+    """Record renditions on every entry showing photo; returns whether any changed."""
+    changed = False
+    for entry in entries:
+        if entry.get('photo') == photo and entry.get('renditions') != renditions:
+            entry['renditions'] = renditions
+            changed = True
+    return changed
+
+
+def main(force=False):
+    if not available():
+        print("Pillow is not installed (pip install Pillow); photos are used as uploaded.")
+        return
+
+    with open(DATA_FILE, 'r') as f:
+        entries = json.load(f)
+
+    changed = False
+    done = set()
+    for entry in entries:
+        photo = entry.get('photo')
+        if not photo or photo in done or not (WEB_DIR / photo).is_file():
+            continue
+        done.add(photo)
+        if force or not is_current(entry):
+            renditions = make_renditions(photo)
+            changed |= apply_renditions(entries, photo, renditions)
+            print(f"{photo}: {', '.join(str(r['width']) for r in renditions)}")
+
+    if changed:
+        tmp_file = f"{DATA_FILE}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(entries, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        os.replace(tmp_file, DATA_FILE)
+    print(f"Checked {len(done)} photos")
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Write card renditions of the #DosaWithMouli photos.")
+    parser.add_argument('--force', action='store_true', help="Redo renditions that are already current")
+    args = parser.parse_args()
+    main(args.force)
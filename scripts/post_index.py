@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Post metadata index.
+Keeps title, date and year for every post in posts/, in .post-index.json at
+the site root, and is kept up to date by the site index (site_index.py),
+which reads the posts. Titles come from the posts themselves. Most posts
+carry no date, so dates come from the post's <p class="post-meta"> when it
+has one, and otherwise from the year archive pages the first time the index
+is built; after that the index is where dates live (edit it to date a post).
+Archive link text that differs from the post's title is kept as its label,
+and the post's position on its archive page as its seq, which orders posts
+that share a date the way the archive always listed them.
+"""
+
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from bs4 import BeautifulSoup
+
+WEB_DIR = Path(__file__).parent.parent
+POSTS_DIR = WEB_DIR / "posts"
+INDEX_PATH = WEB_DIR / ".post-index.json"
+# Version 2 added seq; older indexes take it from the archive pages once
+INDEX_VERSION = 2
+
+ARCHIVE_RE = re.compile(r'^\d{4}\.html$')
+POST_META_RE = re.compile(r'<p class="post-meta">\s*([^<]+?)\s*</p>')
+# "30 Dec", "23 Jan 2021", "Sep 16 2024" on archive pages
+ARCHIVE_DATE_FORMATS = ['%d %b %Y', '%b %d %Y', '%d %b']
+POST_META_DATE_FORMATS = ['%B %d, %Y', '%b %d, %Y', '%d %B %Y', '%d %b %Y', '%Y-%m-%d']
+
+
+def parse_date(text, formats, year=None):
+    """Parse text with the first matching format; returns an ISO date or None."""
+    for fmt in formats:
+        dated_text = text
+        if '%Y' not in fmt:
+            # Parse with the year so that 29 Feb is valid
+            if year is None:
+                continue
+            dated_text, fmt = f"{text} {year}", f"{fmt} %Y"
+        try:
+            return datetime.strptime(dated_text, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def load_index(index_path=INDEX_PATH):
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_index(index, index_path=INDEX_PATH):
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1, sort_keys=True, ensure_ascii=False)
+        f.write('\n')
+    os.replace(tmp_path, index_path)
+
+
+def archive_pages(site_root=WEB_DIR):
+    """{year: path} for every year archive page at the site root."""
+    return {int(name[:4]): Path(site_root) / name
+            for name in sorted(os.listdir(site_root)) if ARCHIVE_RE.match(name)}
+
+
+def archive_links(path):
+    """(filename, link text) of every posts/ link in an archive page's <main>, in order."""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+    main = soup.find('main')
+    return [(a['href'][len('posts/'):], a.get_text().strip())
+            for a in (main.find_all('a', href=True) if main else []) if a['href'].startswith('posts/')]
+
+
+def archive_entries(site_root=WEB_DIR):
+    """Recover {filename: (ISO date, link text, position)} from the archive pages.
+
+    position is the post's place in its archive's list, counting from 0.
+    """
+    entries = {}
+    for year, path in archive_pages(site_root).items():
+        position = 0
+        for filename, text in archive_links(path):
+            label, _, title = text.partition(' - ')
+            date = parse_date(label, ARCHIVE_DATE_FORMATS, year)
+            if date:
+                entries[filename] = (date, title, position)
+                position += 1
+    return entries
+
+
+def refresh_index(index, facts, site_root=WEB_DIR):
+    """Bring the index in line with the posts; builds it if index is None.
+
+    facts maps each post's filename to its (title, post-meta date or None),
+    as read by the site index. Returns (index, changed), changed being the
+    filenames that were added, removed, retitled, redated or reordered.
+    """
+    if index is None:
+        index = {'posts': {}, 'years': {}}
+    if index.get('version', 1) < INDEX_VERSION:
+        archived = archive_entries(site_root)
+        index['version'] = INDEX_VERSION
+    else:
+        archived = {}
+    posts = index['posts']
+    changed = set()
+
+    for filename in set(posts) - set(facts):
+        del posts[filename]
+        changed.add(filename)
+
+    for filename, (title, date) in sorted(facts.items()):
+        entry = posts.get(filename, {})
+        archived_date, label, seq = archived.get(filename, (None, None, None))
+        date = date or entry.get('date') or archived_date
+        updated = {'title': title, 'date': date, 'year': int(date[:4]) if date else None}
+        label = entry.get('label') or label
+        if label and label != title:
+            updated['label'] = label
+        seq = entry.get('seq', seq)
+        if seq is not None:
+            updated['seq'] = seq
+        if updated != entry:
+            posts[filename] = updated
+            changed.add(filename)
+    return index, changed
+
+
+def year_digest(posts, template):
+    """Digest of one year's post list and the chrome it is rendered with."""
+    return hashlib.sha256(json.dumps([template, posts]).encode('utf-8')).hexdigest()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Site index: what every script needs to know about the posts, in SQLite.
+Each post's title, date, word count, text length and preview, image
+references, outbound links, whether search engines may index it, content
+hash and mtime are kept in scripts/.site_index.sqlite. refresh() re-parses
+only the posts whose size or mtime changed, so after the first run the
+scripts (audit_posts.py, generate_sitemap.py, the archive and blog page
+generators) query the index instead of walking and parsing posts/.
+The extractors they share (extract_title(), extract_text()) live here too.
+
+Dates and archive labels come from the committed post ledger
+(.post-index.json, see post_index.py), since most posts do not carry them.
+
+    with SiteIndex.open() as site:
+        site.refresh()
+        for post in site.posts(year=2024):
+            print(post['date'], post['title'], post['word_count'])
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from bs4 import BeautifulSoup
+from link_graph import soup_references
+from post_index import (INDEX_PATH, INDEX_VERSION, POST_META_DATE_FORMATS, POST_META_RE, load_index,
+                        parse_date, refresh_index, save_index)
+
+WEB_DIR = Path(__file__).parent.parent
+POSTS_DIR = WEB_DIR / "posts"
+DB_PATH = Path(__file__).parent / ".site_index.sqlite"
+
+# Bump when what parse_post() extracts or the schema changes; the index is then rebuilt
+PARSER_VERSION = 3
+
+# Tags whose text is page chrome rather than post content
+CHROME_TAGS = {'header', 'nav', 'footer', 'script', 'style'}
+# Characters of text kept as the post's preview
+PREVIEW_LENGTH = 100
+
+REDIRECT_RE = re.compile(rb'<meta[^>]+http-equiv=["\']?refresh', re.I)
+NOINDEX_RE = re.compile(rb'<meta[^>]+name=["\']?robots["\']?[^>]+noindex', re.I)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS posts (
+    slug TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    title TEXT NOT NULL,
+    label TEXT,
+    seq INTEGER,
+    posted TEXT,
+    date TEXT,
+    year INTEGER,
+    word_count INTEGER NOT NULL,
+    text_length INTEGER NOT NULL,
+    text_preview TEXT NOT NULL,
+    indexable INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_year ON posts (year, date);
+CREATE TABLE IF NOT EXISTS images (
+    slug TEXT NOT NULL REFERENCES posts (slug) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    src TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS images_slug ON images (slug);
+CREATE TABLE IF NOT EXISTS links (
+    slug TEXT NOT NULL REFERENCES posts (slug) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS links_slug ON links (slug);
+CREATE INDEX IF NOT EXISTS links_target ON links (target);
+CREATE TABLE IF NOT EXISTS fragments (name TEXT PRIMARY KEY, digest TEXT NOT NULL, html TEXT NOT NULL);
+"""
+
+
+def extract_title(soup):
+    """Extract title from the HTML."""
+    title_tag = soup.find('title')
+    if title_tag:
+        return title_tag.get_text().strip()
+
+    # Fallback to h1 in main
+    h1 = soup.find('main')
+    if h1:
+        h1_tag = h1.find('h1')
+        if h1_tag:
+            return h1_tag.get_text().strip()
+    return "GC Mouli's Blog"
+
+
+def _in_chrome(element, stop=None):
+    return any(parent.name in CHROME_TAGS or parent is stop for parent in element.parents)
+
+
+def extract_text(soup, separator=''):
+    """Extract text content from a parsed post, excluding headers and footer."""
+    # Get main content, skipping its h1 title
+    main = soup.find('main')
+    root = main or soup
+    title = None
+    if main:
+        title = next((h1 for h1 in main.find_all('h1') if not _in_chrome(h1)), None)
+
+    parts = []
+    for string in root.strings:
+        if _in_chrome(string, title):
+            continue
+        string = string.strip()
+        if string:
+            parts.append(string)
+    return separator.join(parts)
+
+
+def is_indexable(content):
+    """False for redirect stubs and noindex pages, which stay out of the sitemap."""
+    return not (REDIRECT_RE.search(content) or NOINDEX_RE.search(content))
+
+
+def parse_post(post_path, site_root=WEB_DIR):
+    """Parse one post into a row for the index.
+
+    Returns a dict with the posts columns (except the ledger's date, year
+    and label), plus 'images' (every <img> src, in order, empty ones
+    included) and 'links' ((kind, site-relative target) pairs).
+    """
+    with open(post_path, 'rb') as f:
+        raw = f.read()
+    content = raw.decode('utf-8', errors='ignore')
+    soup = BeautifulSoup(content, 'html.parser')
+    stat = os.stat(post_path)
+
+    match = POST_META_RE.search(content)
+    links, embeds = soup_references(soup, str(post_path), str(site_root))
+    site_root = os.path.abspath(site_root)
+    text = extract_text(soup)
+    return {
+        'slug': Path(post_path).stem,
+        'filename': Path(post_path).name,
+        'title': extract_title(soup),
+        'posted': parse_date(match.group(1), POST_META_DATE_FORMATS) if match else None,
+        'word_count': len(extract_text(soup, ' ').split()),
+        'text_length': len(text),
+        'text_preview': text[:PREVIEW_LENGTH],
+        'indexable': is_indexable(raw),
+        'content_hash': hashlib.sha256(raw).hexdigest(),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'images': [img.get('src', '') for img in soup.find_all('img')],
+        'links': sorted({(kind, os.path.relpath(target, site_root))
+                         for kind, targets in (('link', links), ('embed', embeds))
+                         for target in targets}),
+    }
+
+
+class SiteIndex:
+    """The post catalog, backed by SQLite."""
+
+    def __init__(self, connection, posts_dir=POSTS_DIR, site_root=WEB_DIR, index_path=INDEX_PATH):
+        self.db = connection
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA foreign_keys = ON')
+        self.posts_dir = Path(posts_dir)
+        self.site_root = Path(site_root)
+        self.index_path = Path(index_path)
+        self.db.executescript(SCHEMA)
+        if self._meta('parser_version') != str(PARSER_VERSION):
+            self.db.executescript('DROP TABLE images; DROP TABLE links; DROP TABLE posts; DROP TABLE fragments;')
+            self.db.executescript(SCHEMA)
+            with self.db:
+                self._set_meta('parser_version', PARSER_VERSION)
+
+    @classmethod
+    def open(cls, db_path=DB_PATH, posts_dir=POSTS_DIR, site_root=WEB_DIR, index_path=INDEX_PATH):
+        return cls(sqlite3.connect(db_path), posts_dir, site_root, index_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def _meta(self, key):
+        row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.db.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, str(value)))
+
+    def _store(self, row):
+        self.db.execute('DELETE FROM posts WHERE slug = ?', (row['slug'],))
+        self.db.execute(
+            'INSERT INTO posts (slug, filename, title, posted, word_count, text_length, text_preview,'
+            ' indexable, content_hash, mtime_ns, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (row['slug'], row['filename'], row['title'], row['posted'], row['word_count'],
+             row['text_length'], row['text_preview'], row['indexable'], row['content_hash'],
+             row['mtime_ns'], row['size']))
+        self.db.executemany('INSERT INTO images (slug, position, src) VALUES (?, ?, ?)',
+                            [(row['slug'], position, src) for position, src in enumerate(row['images'])])
+        self.db.executemany('INSERT INTO links (slug, kind, target) VALUES (?, ?, ?)',
+                            [(row['slug'], kind, target) for kind, target in row['links']])
+
+    def refresh(self, jobs=1):
+        """Re-parse posts added or modified since the last refresh, drop deleted ones.
+
+        Also brings the ledger up to date and copies its dates into the
+        index. Returns the filenames whose row, date or label changed.
+        """
+        known = {row['filename']: (row['mtime_ns'], row['size'])
+                 for row in self.db.execute('SELECT filename, mtime_ns, size FROM posts')}
+        on_disk = {}
+        for entry in os.scandir(self.posts_dir):
+            if entry.name.endswith('.html') and entry.is_file():
+                stat = entry.stat()
+                on_disk[entry.name] = (stat.st_mtime_ns, stat.st_size)
+
+        removed = set(known) - set(on_disk)
+        stale = sorted(name for name, key in on_disk.items() if known.get(name) != key)
+        paths = [self.posts_dir / name for name in stale]
+        if jobs > 1 and len(paths) > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                rows = list(executor.map(parse_post, paths, [self.site_root] * len(paths), chunksize=16))
+        else:
+            rows = [parse_post(path, self.site_root) for path in paths]
+
+        changed = set(removed)
+        with self.db:
+            self.db.executemany('DELETE FROM posts WHERE filename = ?', [(name,) for name in removed])
+            for row in rows:
+                old = self.db.execute('SELECT content_hash FROM posts WHERE filename = ?',
+                                      (row['filename'],)).fetchone()
+                if old is None or old[0] != row['content_hash']:
+                    changed.add(row['filename'])
+                self._store(row)
+            changed |= self._apply_ledger()
+        return changed
+
+    def _apply_ledger(self):
+        facts = {row['filename']: (row['title'], row['posted'])
+                 for row in self.db.execute('SELECT filename, title, posted FROM posts')}
+        ledger = load_index(self.index_path)
+        stale = ledger is None or ledger.get('version', 1) < INDEX_VERSION
+        ledger, changed = refresh_index(ledger, facts, self.site_root)
+        if changed or stale:
+            save_index(ledger, self.index_path)
+        self.db.executemany(
+            'UPDATE posts SET date = ?, year = ?, label = ?, seq = ? WHERE filename = ?',
+            [(entry['date'], entry['year'], entry.get('label'), entry.get('seq'), filename)
+             for filename, entry in ledger['posts'].items()])
+        return changed
+
+    def cached_fragment(self, name, digest):
+        """A rendered fragment stored under name, if it was stored with digest."""
+        row = self.db.execute('SELECT html FROM fragments WHERE name = ? AND digest = ?',
+                              (name, digest)).fetchone()
+        return row[0] if row else None
+
+    def store_fragment(self, name, digest, html):
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO fragments (name, digest, html) VALUES (?, ?, ?)',
+                            (name, digest, html))
+
+    # Queries
+
+    def post(self, slug):
+        return self.db.execute('SELECT * FROM posts WHERE slug = ?', (slug,)).fetchone()
+
+    def posts(self, year=None):
+        """Dated posts, newest first; every dated post unless year is given.
+
+        Posts that share a date keep their archive order (seq); posts added
+        since, which have none, come first.
+        """
+        order = 'ORDER BY date DESC, seq IS NOT NULL, seq, COALESCE(label, title) DESC'
+        if year is None:
+            return self.db.execute(f'SELECT * FROM posts WHERE year IS NOT NULL {order}').fetchall()
+        return self.db.execute(f'SELECT * FROM posts WHERE year = ? {order}', (year,)).fetchall()
+
+    def all_posts(self):
+        """Every post, dated or not, by filename."""
+        return self.db.execute('SELECT * FROM posts ORDER BY filename').fetchall()
+
+    def undated(self):
+        return [row['filename'] for row in
+                self.db.execute('SELECT filename FROM posts WHERE year IS NULL ORDER BY filename')]
+
+    def years(self):
+        return [row[0] for row in
+                self.db.execute('SELECT DISTINCT year FROM posts WHERE year IS NOT NULL ORDER BY year')]
+
+    def images(self, slug):
+        """Every <img> src in the post, in document order."""
+        return [row[0] for row in
+                self.db.execute('SELECT src FROM images WHERE slug = ? ORDER BY position', (slug,))]
+
+    def links_from(self, slug, kind='link'):
+        """Site-relative paths the post links to (kind='embed' for images, CSS, ...)."""
+        return [row[0] for row in self.db.execute(
+            'SELECT target FROM links WHERE slug = ? AND kind = ? ORDER BY target', (slug, kind))]
+
+    def links_to(self, target, kind='link'):
+        """Slugs of the posts that link to a site-relative path."""
+        return [row[0] for row in self.db.execute(
+            'SELECT DISTINCT slug FROM links WHERE target = ? AND kind = ? ORDER BY slug', (target, kind))]
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description="Refresh the site index and print a summary.")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for parsing changed posts")
+    parser.add_argument('--rebuild', action='store_true', help="Drop the index and parse every post")
+    args = parser.parse_args()
+
+    if args.rebuild and DB_PATH.exists():
+        DB_PATH.unlink()
+    started = time.perf_counter()
+    with SiteIndex.open() as site:
+        changed = site.refresh(args.jobs)
+        elapsed = time.perf_counter() - started
+        total = len(site.all_posts())
+        print(f"Indexed {total} posts ({len(changed)} changed) in {elapsed:.2f}s")
+        for year in site.years():
+            posts = site.posts(year)
+            print(f"  {year}: {len(posts)} posts, {sum(post['word_count'] for post in posts)} words")
+        undated = site.undated()
+        if undated:
+            print(f"  undated: {len(undated)}")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Shared page chrome for every generator.
+The head (favicon, fonts, stylesheet, Google Analytics), header, nav and
+footer are rendered from .blogeditor.json, the same config the blog editor
+uses, so a sitewide change is an edit there and one run of the generators.
+The footer's copyright year is copyrightYear there too, not the build date,
+so output does not depend on the day the generators run.
+
+Links in the config are written as seen from posts/ ("../blog.html"); each
+page passes the path back to the site root ("../" for posts, "" for
+top-level pages) and site-relative links are rebased onto it.
+"""
+
+import hashlib
+import html
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+WEB_DIR = Path(__file__).parent.parent
+CONFIG_PATH = WEB_DIR / ".blogeditor.json"
+
+
+def rebase(href, root):
+    """Rewrite a posts/-relative href for a page whose site root is root."""
+    if href.startswith('../'):
+        return root + href[3:]
+    return href
+
+
+class SiteTemplates:
+    """Page chrome rendered from the site config.
+
+    Fragments that do not depend on the page are rendered once per root and
+    kept, so rendering a page is string concatenation.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.site_name = config.get('siteName', 'GC Mouli')
+        self.year = config.get('copyrightYear')
+        self._cache = {}
+
+    @property
+    def fingerprint(self):
+        """Changes whenever any rendered chrome would change."""
+        key = json.dumps(self.config, sort_keys=True)
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def _cached(self, key, render):
+        if key not in self._cache:
+            self._cache[key] = render()
+        return self._cache[key]
+
+    def fonts(self, indent='    '):
+        """Google Fonts preconnects and stylesheet link."""
+        return self._cached(('fonts', indent), lambda: (
+            f'{indent}<link rel="preconnect" href="https://fonts.googleapis.com">\n'
+            f'{indent}<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n'
+            f'{indent}<link href="https://fonts.googleapis.com/css2?family={self.config["fonts"]}'
+            f'&display=swap" rel="stylesheet">'))
+
+    def analytics(self):
+        ga_id = self.config.get('gaId')
+        if not ga_id:
+            return ''
+        return f"""
+
+    <!-- Google Analytics -->
+    <script async src="https://www.googletagmanager.com/gtag/js?id={ga_id}"></script>
+    <script>
+        window.dataLayer = window.dataLayer || [];
+        function gtag(){{dataLayer.push(arguments);}}
+        gtag('js', new Date());
+        gtag('config', '{ga_id}');
+    </script>"""
+
+    def _head_parts(self, root, stylesheet):
+        def render():
+            favicon = rebase(self.config.get('favicon', '../favicon-32x32.png'), root)
+            before = ('<head>\n'
+                      '    <meta charset="UTF-8">\n'
+                      '    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+                      '    <title>')
+            after = (f'</title>\n'
+                     f'    <link rel="icon" type="image/png" href="{favicon}">\n'
+                     f'\n'
+                     f'    <!-- Google Fonts -->\n'
+                     f'{self.fonts()}')
+            if stylesheet:
+                after += f'\n\n    <link rel="stylesheet" href="{rebase(self.config.get("cssPath", "../styles.css"), root)}">'
+            after += self.analytics()
+            return before, after
+        return self._cached(('head', root, stylesheet), render)
+
+    def head(self, title, root='', stylesheet=True, extra=''):
+        """The <head> element; extra (e.g. an inline <style>) goes last."""
+        before, after = self._head_parts(root, stylesheet)
+        if extra:
+            after += '\n\n    ' + extra
+        return f'{before}{title}{after}\n</head>'
+
+    def nav(self, root='', indent=12, active=None):
+        """The <nav> list; its first line is left for the caller to indent.
+
+        active is the (rebased) href of the current page.
+        """
+        pad = ' ' * indent
+        lines = ['<nav>', f'{pad}    <ul>']
+        for item in self.config.get('nav', []):
+            href = rebase(item['href'], root)
+            attrs = f'href="{href}"'
+            if href == active:
+                attrs += ' class="active"'
+            lines.append(f'{pad}        <li><a {attrs}>{html.escape(item["label"], quote=False)}</a></li>')
+        lines += [f'{pad}    </ul>', f'{pad}</nav>']
+        return '\n'.join(lines)
+
+    def header(self, root=''):
+        return self._cached(('header', root), lambda: (
+            f'<header>\n'
+            f'            <h1><a href="{root}index.html">{self.site_name}</a></h1>\n'
+            f'            {self.nav(root)}\n'
+            f'        </header>'))
+
+    def footer(self, indent=8):
+        pad = ' ' * indent
+        notice = ' '.join(str(part) for part in (self.year, self.config.get('footer', '')) if part)
+        return self._cached(('footer', indent), lambda: (
+            f'<footer>\n'
+            f'{pad}    <p>&copy; {notice}</p>\n'
+            f'{pad}</footer>'))
+
+    def page(self, title, main, root=''):
+        """A full page in the standard layout; main is the indented inside of <main>."""
+        return f"""<!DOCTYPE html>
+<html lang="en">
+{self.head(title, root)}
+<body>
+    <div class="container">
+        {self.header(root)}
+
+        <main>
+{main}
+        </main>
+
+        {self.footer()}
+    </div>
+</body>
+</html>
+"""
+
+
+@lru_cache(maxsize=None)
+def _load(config_path, mtime_ns):
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return SiteTemplates(json.load(f))
+
+
+def load_templates(config_path=CONFIG_PATH):
+    """The site templates, reloaded only when the config file changes."""
+    config_path = os.path.abspath(config_path)
+    return _load(config_path, os.stat(config_path).st_mtime_ns)
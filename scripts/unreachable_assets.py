@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Unreachable Asset Report
+Crawls the site from index.html (and 404.html) through links, images,
+srcsets, stylesheets and CSS url() references, then lists every file in the
+asset folders that the crawl never reached.
+The output file holds one path per line, relative to the site root, so it
+can be passed straight to RemoveUnref.py from the site root:
+    python3 scripts/unreachable_assets.py -o unreachable.txt
+    python3 scripts/RemoveUnref.py unreachable.txt
+"""
+
+import os
+from pathlib import Path
+from link_graph import LinkGraph
+
+WEB_DIR = Path(__file__).parent.parent
+START_PAGES = ['index.html', '404.html']
+ASSET_DIRS = ['media', 'photos', 'project-thumbs']
+
+
+def find_unreachable_assets(site_root, start_pages=START_PAGES, asset_dirs=ASSET_DIRS):
+    """Return (unreachable, reached): asset paths relative to site_root, and every reached file."""
+    site_root = os.path.abspath(site_root)
+    graph = LinkGraph(site_root)
+    starts = [os.path.join(site_root, page) for page in start_pages
+              if os.path.exists(os.path.join(site_root, page))]
+    reached = graph.crawl(starts)
+
+    unreachable = []
+    for asset_dir in asset_dirs:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(site_root, asset_dir)):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                file_path = os.path.normpath(os.path.join(dirpath, filename))
+                if file_path not in reached:
+                    unreachable.append(os.path.relpath(file_path, site_root))
+    return unreachable, reached
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="List asset files that no page reachable from index.html uses.")
+    parser.add_argument('--site-root', default=str(WEB_DIR), help="Site root (default: the repository root)")
+    parser.add_argument('--start', action='append', help="Page to crawl from, relative to the site root "
+                        f"(repeatable; default: {', '.join(START_PAGES)})")
+    parser.add_argument('--asset-dir', action='append', help="Folder to report on, relative to the site root "
+                        f"(repeatable; default: {', '.join(ASSET_DIRS)})")
+    parser.add_argument('-o', '--output', help="Write the list here instead of stdout")
+    args = parser.parse_args()
+
+    unreachable, reached = find_unreachable_assets(args.site_root, args.start or START_PAGES,
+                                                   args.asset_dir or ASSET_DIRS)
+    total_bytes = sum(os.path.getsize(os.path.join(args.site_root, path)) for path in unreachable)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.writelines(path + '\n' for path in unreachable)
+        print(f"Crawled {len(reached)} files; {len(unreachable)} unreachable assets "
+              f"({total_bytes / 1024 / 1024:.1f} MB) written to {args.output}")
+    else:
+        for path in unreachable:
+            print(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Generate blog.html from the site index.
+Each year gets a summary fragment listing its posts (only the latest few
+with --posts-per-year), and the years are split across blog.html, blog-2.html, ... newest first. Fragments are cached
+in the site index under a digest of what they show, and pages are only
+written when their content changes, so a new post re-renders its year's
+fragment and rewrites the first page only.
+"""
+
+import glob
+import hashlib
+import html
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from site_index import SiteIndex
+from site_templates import load_templates
+
+WEB_DIR = Path(__file__).parent.parent
+YEARS_PER_PAGE = 6
+# None lists every post of the year, as the hand-maintained page did for recent years
+POSTS_PER_YEAR = None
+# Bump when render_year_summary() changes, to invalidate cached fragments
+SUMMARY_VERSION = 1
+
+BLOG_STYLE = '''<style>
+        :root {
+            --cream: #FAF8F5;
+            --warm-white: #FFFEFA;
+            --ink: #2C2416;
+            --muted: #6B5D4D;
+            --accent: #7C5E4A;
+            --accent-hover: #5C4535;
+            --border: #E8E2D9;
+        }
+
+        * {
+            box-sizing: border-box;
+            margin: 0;
+            padding: 0;
+        }
+
+        html {
+            font-size: 18px;
+        }
+
+        body {
+            font-family: 'Lora', Georgia, serif;
+            line-height: 1.75;
+            color: var(--ink);
+            background-color: var(--cream);
+            min-height: 100vh;
+            display: flex;
+            flex-direction: column;
+        }
+
+        .page-container {
+            max-width: 720px;
+            margin: 0 auto;
+            padding: 0 2rem;
+            flex: 1;
+            display: flex;
+            flex-direction: column;
+        }
+
+        /* Navigation */
+        nav {
+            padding: 2rem 0;
+            font-family: 'Source Sans 3', sans-serif;
+        }
+
+        nav ul {
+            list-style: none;
+            display: flex;
+            gap: 2rem;
+        }
+
+        nav a {
+            color: var(--muted);
+            text-decoration: none;
+            font-size: 0.85rem;
+            font-weight: 500;
+            text-transform: uppercase;
+            letter-spacing: 0.1em;
+            transition: color 0.2s;
+        }
+
+        nav a:hover {
+            color: var(--ink);
+        }
+
+        /* Page Header */
+        .page-header {
+            padding: 3rem 0;
+            border-bottom: 1px solid var(--border);
+            margin-bottom: 1rem;
+        }
+
+        .page-header h1 {
+            font-family: 'Playfair Display', Georgia, serif;
+            font-size: 3.5rem;
+            font-weight: 600;
+            letter-spacing: -0.02em;
+            margin-bottom: 0.5rem;
+        }
+
+        .page-header .subtitle {
+            font-size: 1.15rem;
+            font-style: italic;
+            color: var(--muted);
+        }
+
+        /* Year Section */
+        .year-section {
+            padding: 2.5rem 0 2rem;
+            border-bottom: 1px solid var(--border);
+        }
+
+        .year-section:last-of-type {
+            border-bottom: none;
+        }
+
+        .year-header {
+            display: flex;
+            align-items: baseline;
+            justify-content: space-between;
+            margin-bottom: 1.5rem;
+        }
+
+        .year-header h2 {
+            font-family: 'Playfair Display', Georgia, serif;
+            font-size: 2rem;
+            font-weight: 600;
+            color: var(--ink);
+            margin: 0;
+        }
+
+        .year-link {
+            font-family: 'Source Sans 3', sans-serif;
+            font-size: 0.85rem;
+            font-weight: 500;
+            color: var(--accent);
+            text-decoration: none;
+            transition: color 0.2s;
+        }
+
+        .year-link:hover {
+            color: var(--accent-hover);
+        }
+
+        /* Post List */
+        .post-list {
+            list-style: none;
+        }
+
+        .post-list li {
+            padding: 0.85rem 0;
+            border-bottom: 1px solid var(--border);
+        }
+
+        .post-list li:last-child {
+            border-bottom: none;
+        }
+
+        .post-list a {
+            display: flex;
+            align-items: baseline;
+            gap: 1rem;
+            text-decoration: none;
+            transition: color 0.2s;
+        }
+
+        .post-date {
+            font-family: 'Source Sans 3', sans-serif;
+            font-size: 0.9rem;
+            color: var(--muted);
+            flex-shrink: 0;
+            min-width: 4.5rem;
+        }
+
+        .post-title {
+            font-size: 1.15rem;
+            color: var(--ink);
+            line-height: 1.4;
+        }
+
+        .post-list a:hover .post-title {
+            color: var(--accent);
+        }
+
+        /* Pagination */
+        .pagination {
+            display: flex;
+            justify-content: space-between;
+            align-items: baseline;
+            padding: 2rem 0;
+            font-family: 'Source Sans 3', sans-serif;
+            font-size: 0.9rem;
+            color: var(--muted);
+        }
+
+        .pagination a {
+            color: var(--accent);
+            text-decoration: none;
+            transition: color 0.2s;
+        }
+
+        .pagination a:hover {
+            color: var(--accent-hover);
+        }
+
+        /* Footer */
+        footer {
+            padding: 2rem 0;
+            margin-top: auto;
+            font-family: 'Source Sans 3', sans-serif;
+            font-size: 0.8rem;
+            color: var(--muted);
+            border-top: 1px solid var(--border);
+        }
+
+        /* Responsive */
+        @media (max-width: 768px) {
+            html {
+                font-size: 16px;
+            }
+
+            .page-container {
+                padding: 0 1.5rem;
+            }
+
+            .page-header {
+                padding: 2rem 0;
+            }
+
+            .page-header h1 {
+                font-size: 2.5rem;
+            }
+
+            .year-section {
+                padding: 2rem 0 1.5rem;
+            }
+
+            .year-header {
+                flex-direction: column;
+                gap: 0.5rem;
+            }
+
+            .post-list a {
+                flex-direction: column;
+                gap: 0.25rem;
+            }
+
+            .post-date {
+                font-size: 0.85rem;
+            }
+
+            nav ul {
+                gap: 1.5rem;
+            }
+        }
+    </style>'''
+
+
+def page_filename(number):
+    return 'blog.html' if number == 1 else f'blog-{number}.html'
+
+
+def render_year_summary(year, posts):
+    """The section for one year: its latest (date, label, filename) posts."""
+    items = '\n'.join(
+        f'                    <li><a href="posts/{filename}">'
+        f'<span class="post-date">{datetime.strptime(date, "%Y-%m-%d").strftime("%b %d")}</span>'
+        f'<span class="post-title">{html.escape(label, quote=False)}</span></a></li>'
+        for date, label, filename in posts)
+    return f"""            <section class="year-section">
+                <div class="year-header">
+                    <h2>{year}</h2>
+                    <a href="{year}.html" class="year-link">View all &rarr;</a>
+                </div>
+                <ul class="post-list">
+{items}
+                </ul>
+            </section>"""
+
+
+def year_summary(site, year, posts_per_year=POSTS_PER_YEAR):
+    """Return (fragment, rendered): the cached fragment, re-rendered if its posts changed."""
+    posts = [(post['date'], post['label'] or post['title'], post['filename'])
+             for post in site.posts(year)[:posts_per_year]]
+    key = json.dumps([SUMMARY_VERSION, year, posts])
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    fragment = site.cached_fragment(f'blog-year-{year}', digest)
+    if fragment is not None:
+        return fragment, False
+    fragment = render_year_summary(year, posts)
+    site.store_fragment(f'blog-year-{year}', digest, fragment)
+    return fragment, True
+
+
+def render_pagination(number, total):
+    if total == 1:
+        return ''
+    newer = (f'<a href="{page_filename(number - 1)}">&larr; Newer posts</a>'
+             if number > 1 else '<span></span>')
+    older = (f'<a href="{page_filename(number + 1)}">Older posts &rarr;</a>'
+             if number < total else '<span></span>')
+    return f"""
+            <div class="pagination">
+                {newer}
+                <span>Page {number} of {total}</span>
+                {older}
+            </div>"""
+
+
+def render_blog_page(number, total, sections):
+    templates = load_templates()
+    title = "Blog" if number == 1 else f"Blog (page {number})"
+    body = '\n\n'.join(sections)
+    return f"""<!DOCTYPE html>
+<html lang="en">
+{templates.head(f"{title} - {templates.site_name}", stylesheet=False, extra=BLOG_STYLE)}
+<body>
+    <div class="page-container">
+        {templates.nav(indent=8)}
+
+        <header class="page-header">
+            <h1>Writing</h1>
+            <p class="subtitle">Thoughts on product, people, and everything in between</p>
+        </header>
+
+        <main>
+{body}{render_pagination(number, total)}
+        </main>
+
+        {templates.footer()}
+    </div>
+</body>
+</html>
+"""
+
+
+def write_if_changed(path, content):
+    """Write content to path unless it already holds exactly that; returns whether it wrote."""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return True
+
+
+def main(years_per_page=YEARS_PER_PAGE, posts_per_year=POSTS_PER_YEAR, jobs=1):
+    with SiteIndex.open() as site:
+        site.refresh(jobs)
+        years = sorted(site.years(), reverse=True)
+        sections = []
+        rendered = 0
+        for year in years:
+            fragment, fresh = year_summary(site, year, posts_per_year)
+            sections.append(fragment)
+            rendered += fresh
+
+    pages = [sections[i:i + years_per_page] for i in range(0, len(sections), years_per_page)] or [[]]
+    written = []
+    for number, page_sections in enumerate(pages, 1):
+        filename = page_filename(number)
+        if write_if_changed(WEB_DIR / filename, render_blog_page(number, len(pages), page_sections)):
+            written.append(filename)
+
+    # Pages past the end, left over from a larger page size
+    removed = []
+    for path in sorted(glob.glob(str(WEB_DIR / 'blog-*.html'))):
+        suffix = os.path.basename(path)[len('blog-'):-len('.html')]
+        if suffix.isdigit() and int(suffix) > len(pages):
+            os.remove(path)
+            removed.append(os.path.basename(path))
+
+    print(f"{len(years)} years on {len(pages)} pages; {rendered} year summaries re-rendered")
+    print(f"Pages written: {', '.join(written) or 'none'}")
+    if removed:
+        print(f"Pages removed: {', '.join(removed)}")
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate the paginated blog index from the site index.")
+    parser.add_argument('--years-per-page', type=int, default=YEARS_PER_PAGE,
+                        help=f"Year summaries per page (default: {YEARS_PER_PAGE})")
+    parser.add_argument('--posts-per-year', type=int, default=POSTS_PER_YEAR,
+                        help="Latest posts shown in each year summary (default: every post)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for re-indexing changed posts")
+    args = parser.parse_args()
+    main(args.years_per_page, args.posts_per_year, args.jobs)
@@ -4,66 +4,25 @@ Batch update blog posts with new design system.
 Updates header, footer, adds Google Fonts, and fixes image paths.
 """
 
+import hashlib
+import json
 import os
 import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
 from pathlib import Path
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString
+from site_index import extract_title
+from site_templates import load_templates
 
 POSTS_DIR = Path(__file__).parent.parent / "posts"
+CACHE_PATH = Path(__file__).parent / ".update_posts_cache.json"
 
-# New head content template
-HEAD_TEMPLATE = """<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <link rel="icon" type="image/png" href="../favicon-32x32.png">
-
-    <!-- Google Fonts -->
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Lora:ital,wght@0,400;0,500;0,600;1,400&family=Playfair+Display:wght@500;600;700&family=Source+Sans+3:wght@400;500;600&display=swap" rel="stylesheet">
-
-    <link rel="stylesheet" href="../styles.css">
-
-    <!-- Google Analytics -->
-    <script async src="https://www.googletagmanager.com/gtag/js?id=G-NGJ9C40ZGL"></script>
-    <script>
-        window.dataLayer = window.dataLayer || [];
-        function gtag(){{dataLayer.push(arguments);}}
-        gtag('js', new Date());
-        gtag('config', 'G-NGJ9C40ZGL');
-    </script>
-</head>"""
-
-HEADER_TEMPLATE = """<header>
-            <h1><a href="../index.html">GC Mouli</a></h1>
-            <nav>
-                <ul>
-                    <li><a href="../index.html">Home</a></li>
-                    <li><a href="../blog.html">Blog</a></li>
-                    <li><a href="https://sonofcauverybook.in/html/index.html">Son of Cauvery</a></li>
-                </ul>
-            </nav>
-        </header>"""
-
-FOOTER_TEMPLATE = """<footer>
-            <p>&copy; 2025 Mouli Gopalakrishnan</p>
-        </footer>"""
-
-
-def extract_title(soup):
-    """Extract title from the HTML."""
-    title_tag = soup.find('title')
-    if title_tag:
-        return title_tag.get_text().strip()
-
-    # Fallback to h1 in main
-    h1 = soup.find('main')
-    if h1:
-        h1_tag = h1.find('h1')
-        if h1_tag:
-            return h1_tag.get_text().strip()
-    return "GC Mouli's Blog"
+# Whitespace the page template puts around the content inside <article>
+ARTICLE_LEADING = "\n"
+ARTICLE_TRAILING = "\n            "
 
 
 def extract_main_content(soup):
@@ -79,7 +38,16 @@ def extract_main_content(soup):
                 return str(content)
         return ""
 
-    return main.decode_contents()
+    # Posts already in the new design wrap their content in <article>;
+    # unwrap it so that re-running does not nest another one. The parser
+    # collapses whitespace-only strings, so the content is stripped and the
+    # template adds fixed whitespace back, which keeps re-runs byte-identical.
+    children = [child for child in main.contents
+                if not (type(child) is NavigableString and not child.strip())]
+    if len(children) == 1 and children[0].name == 'article':
+        return children[0].decode_contents().strip()
+
+    return main.decode_contents().strip()
 
 
 def fix_image_paths(content):
@@ -91,73 +59,343 @@ def fix_image_paths(content):
     return content
 
 
-def update_post(post_path):
-    """Update a single blog post with new design."""
-    try:
-        with open(post_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+def write_atomic(path, content):
+    """Write content to a temp file next to path, then rename it into place.
 
-        soup = BeautifulSoup(content, 'html.parser')
+    An interrupted run leaves each post either fully old or fully new.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
-        # Extract title
-        title = extract_title(soup)
 
-        # Extract main content
-        main_content = extract_main_content(soup)
+def template_fingerprint():
+    """Fingerprint of the page chrome every post is rendered with."""
+    chrome = '\0'.join((load_templates().fingerprint, ARTICLE_LEADING, ARTICLE_TRAILING))
+    return hashlib.sha256(chrome.encode('utf-8')).hexdigest()
 
-        # Fix image paths
-        main_content = fix_image_paths(main_content)
 
-        # Build new HTML
-        new_html = f"""<!DOCTYPE html>
-<html lang="en">
-{HEAD_TEMPLATE.format(title=title)}
-<body>
-    <div class="container">
-        {HEADER_TEMPLATE}
+def render_fingerprint(template, title, main_content):
+    """Fingerprint of everything a post's rendered output depends on."""
+    return hashlib.sha256('\0'.join((template, title, main_content)).encode('utf-8')).hexdigest()
 
-        <main>
-            <article>
-{main_content}
-            </article>
-        </main>
 
-        {FOOTER_TEMPLATE}
-    </div>
-</body>
-</html>
-"""
+def load_cache():
+    try:
+        with open(CACHE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(entries):
+    tmp_path = CACHE_PATH.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f)
+    os.replace(tmp_path, CACHE_PATH)
+
+
+class SpliceError(Exception):
+    """The page is too irregular to splice; use the DOM path instead."""
+
+
+class PostTokenizer(HTMLParser):
+    """Find a post's title and the boundaries of its <main> content.
+
+    Only tokenizes; nothing is built, so the content between the boundaries
+    can be copied through byte for byte.
+    """
+
+    def __init__(self, content):
+        super().__init__(convert_charrefs=True)
+        self.line_offsets = [0] + [m.end() for m in re.finditer('\n', content)]
+        self.title = None
+        self.main_bounds = None
+        self.article_bounds = None
+        self.has_article = False
+        self._title_parts = None
+        self._main_start = None
+        self._in_main = False
+        # Whether <article> is so far the only thing in <main>: None before
+        # anything has been seen, then True or False
+        self._sole_article = None
+        self._article_depth = 0
+        self._article_start = None
+
+    def _offset(self):
+        line, column = self.getpos()
+        return self.line_offsets[line - 1] + column
+
+    def _significant(self, kind, tag=None):
+        # Called for every non-whitespace token inside <main>
+        if tag == 'article':
+            self.has_article = True
+        if self._article_depth:
+            if tag == 'article' and kind == 'start':
+                self._article_depth += 1
+            elif tag == 'article' and kind == 'end':
+                self._article_depth -= 1
+                if not self._article_depth:
+                    self.article_bounds = (self._article_start, self._offset())
+            return
+        if self._sole_article is None and kind == 'start' and tag == 'article':
+            self._sole_article = True
+            self._article_depth = 1
+            self._article_start = self._offset() + len(self.get_starttag_text())
+        else:
+            self._sole_article = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title' and self.title is None:
+            self._title_parts = []
+        elif tag == 'main':
+            if self._main_start is not None:
+                raise SpliceError("more than one <main>")
+            self._in_main = True
+            self._main_start = self._offset() + len(self.get_starttag_text())
+        elif self._in_main:
+            self._significant('start', tag)
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._title_parts is not None:
+            self.title = ''.join(self._title_parts).strip()
+            self._title_parts = None
+        elif tag == 'main' and self._in_main:
+            if self._article_depth:
+                raise SpliceError("unclosed <article>")
+            self.main_bounds = (self._main_start, self._offset())
+            self._in_main = False
+        elif self._in_main:
+            self._significant('end', tag)
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+        if self._in_main and data.strip():
+            self._significant('data')
+
+    def handle_comment(self, data):
+        if self._in_main:
+            self._significant('comment')
+
+    def handle_decl(self, decl):
+        if self._in_main:
+            self._significant('decl')
+
+    def handle_pi(self, data):
+        if self._in_main:
+            self._significant('pi')
+
+
+def splice_post(content):
+    """Extract (title, main_content) by tokenizing, without building a DOM.
+
+    The content is the source text inside <main>, or inside <main>'s only
+    child <article>, copied verbatim. Raises SpliceError when the page
+    needs the DOM path: no <title>, no or several <main>, or an <article>
+    that is not the only thing in <main>.
+    """
+    tokenizer = PostTokenizer(content)
+    tokenizer.feed(content)
+    tokenizer.close()
+
+    if tokenizer.title is None:
+        raise SpliceError("no <title>")
+    if tokenizer.main_bounds is None:
+        raise SpliceError("no complete <main>")
+    if tokenizer._sole_article and tokenizer.article_bounds:
+        start, end = tokenizer.article_bounds
+    elif tokenizer.has_article:
+        raise SpliceError("<article> is not the only child of <main>")
+    else:
+        start, end = tokenizer.main_bounds
+
+    main_content = fix_image_paths(content[start:end].strip())
+    return tokenizer.title, main_content
+
+
+def extract_post(content, engine='splice'):
+    """Extract (title, main_content) to render.
+
+    The splice engine is tried first; irregular pages, and every page when
+    engine is 'dom', go through BeautifulSoup.
+    """
+    if engine == 'splice':
+        try:
+            return splice_post(content)
+        except SpliceError:
+            pass
+    return dom_extract_post(content)
+
+
+def dom_extract_post(content):
+    """Parse a post into a DOM; returns (title, main_content) to render."""
+    soup = BeautifulSoup(content, 'html.parser')
+
+    # Extract title
+    title = extract_title(soup)
+
+    # Extract main content
+    main_content = extract_main_content(soup)
+
+    # Fix image paths
+    main_content = fix_image_paths(main_content)
+
+    return title, main_content
+
+
+def render_post(title, main_content):
+    """Render the new design around a post's title and content."""
+    article = f"            <article>{ARTICLE_LEADING}{main_content}{ARTICLE_TRAILING}</article>"
+    return load_templates().page(title, article, root='../')
+
+
+def update_post(post_path, entry=None, template=None, engine='splice'):
+    """Update a single blog post with new design.
+
+    entry is the post's record from the last run. If the file and the
+    templates are unchanged since then, the post is not even read; if the
+    render fingerprint matches, or the output would be byte-identical, it
+    is not written. Returns (ok, error, written, entry).
+    """
+    template = template or template_fingerprint()
+    try:
+        stat = os.stat(post_path)
+        if (entry and entry.get('template') == template
+                and entry.get('mtime_ns') == stat.st_mtime_ns and entry.get('size') == stat.st_size):
+            return True, None, False, entry
 
-        # Write updated content
-        with open(post_path, 'w', encoding='utf-8') as f:
-            f.write(new_html)
+        with open(post_path, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
 
-        return True, None
+        title, main_content = extract_post(content, engine)
+        fingerprint = render_fingerprint(template, title, main_content)
+        written = False
+
+        if not (entry and entry.get('fingerprint') == fingerprint):
+            new_html = render_post(title, main_content)
+            if new_html != content:
+                # Write updated content
+                write_atomic(post_path, new_html)
+                written = True
+                stat = os.stat(post_path)
+
+        return True, None, written, {
+            'template': template,
+            'fingerprint': fingerprint,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+        }
 
     except Exception as e:
-        return False, str(e)
+        return False, str(e), False, None
+
 
+def timed_update(job):
+    """Run update_post and time it; returns (name, ok, error, written, entry, seconds)."""
+    post_path, entry, template, engine = job
+    started = time.perf_counter()
+    ok, error, written, entry = update_post(post_path, entry, template, engine)
+    return post_path.name, ok, error, written, entry, time.perf_counter() - started
 
-def main():
+
+def print_summary(latencies, elapsed):
+    """Print throughput and per-file latency percentiles."""
+    if not latencies:
+        return
+    latencies = sorted(latencies)
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    print(f"Throughput: {len(latencies) / elapsed:.1f} posts/second ({elapsed:.2f}s total)")
+    print(f"Per-file latency: p50 {percentile(50):.1f}ms, p95 {percentile(95):.1f}ms, "
+          f"max {latencies[-1] * 1000:.1f}ms")
+
+
+def benchmark(post_files):
+    """Compare the splice and DOM engines on every post, without writing."""
+    contents = []
+    for post_path in post_files:
+        with open(post_path, 'r', encoding='utf-8', errors='ignore') as f:
+            contents.append(f.read())
+
+    started = time.perf_counter()
+    dom_results = [dom_extract_post(content) for content in contents]
+    dom_elapsed = time.perf_counter() - started
+
+    fallbacks = 0
+    started = time.perf_counter()
+    splice_results = []
+    for content in contents:
+        try:
+            splice_results.append(splice_post(content))
+        except SpliceError:
+            fallbacks += 1
+            splice_results.append(dom_extract_post(content))
+    splice_elapsed = time.perf_counter() - started
+
+    differ = sum(render_post(*a) != render_post(*b) for a, b in zip(dom_results, splice_results))
+    total = len(contents)
+    print(f"Benchmarked {total} posts")
+    print(f"  DOM:    {dom_elapsed:.2f}s ({dom_elapsed / total * 1000:.2f}ms/post)")
+    print(f"  Splice: {splice_elapsed:.2f}s ({splice_elapsed / total * 1000:.2f}ms/post), "
+          f"{fallbacks} fell back to DOM")
+    print(f"  Speedup: {dom_elapsed / splice_elapsed:.1f}x; output differs for {differ} posts")
+
+
+def main(jobs=1, force=False, engine='splice'):
     """Update all blog posts."""
-    post_files = list(POSTS_DIR.glob('*.html'))
+    post_files = sorted(POSTS_DIR.glob('*.html'))
     total = len(post_files)
     success = 0
+    written = 0
     errors = []
+    latencies = []
+    template = template_fingerprint()
+    cache = {} if force else load_cache()
+    entries = {}
+    jobs_list = [(post_path, cache.get(post_path.name), template, engine) for post_path in post_files]
+
+    print(f"Updating {total} blog posts with {jobs} job(s), {engine} engine...")
+    started = time.perf_counter()
+
+    if jobs > 1:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        results = pool.map(timed_update, jobs_list, chunksize=16)
+    else:
+        pool = None
+        results = map(timed_update, jobs_list)
 
-    print(f"Updating {total} blog posts...")
-
-    for i, post_path in enumerate(sorted(post_files)):
-        ok, error = update_post(post_path)
-        if ok:
-            success += 1
-        else:
-            errors.append((post_path.name, error))
-
-        if (i + 1) % 100 == 0:
-            print(f"  Progress: {i + 1}/{total}")
-
+    try:
+        for i, (name, ok, error, was_written, entry, seconds) in enumerate(results):
+            latencies.append(seconds)
+            if ok:
+                success += 1
+                written += was_written
+                entries[name] = entry
+            else:
+                errors.append((name, error))
+
+            if (i + 1) % 100 == 0:
+                print(f"  Progress: {i + 1}/{total}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        save_cache(entries)
+
+    elapsed = time.perf_counter() - started
     print(f"\nCompleted: {success}/{total} posts updated successfully")
+    print(f"Files touched: {written} ({success - written} already up to date)")
+    print_summary(latencies, elapsed)
 
     if errors:
         print(f"\nErrors ({len(errors)}):")
@@ -168,4 +406,19 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Update all blog posts with the current design.")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (1 runs inline)")
+    parser.add_argument('--force', action='store_true',
+                        help="Ignore the fingerprint cache and re-check every post")
+    parser.add_argument('--engine', choices=('splice', 'dom'), default='splice',
+                        help="splice copies <main> through verbatim (DOM only for irregular pages); "
+                             "dom re-serializes every post through BeautifulSoup")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Time the splice and DOM engines over all posts without writing anything")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark(sorted(POSTS_DIR.glob('*.html')))
+    else:
+        main(args.jobs, args.force, args.engine)
@@ -1,136 +1,130 @@
 #!/usr/bin/env python3
 """
 Update year archive pages with new design.
+Pages are built from the site index (see site_index.py) rather than from
+the previous pages, and only years whose posts changed are rewritten.
+Links the previous page had that the new one leaves out are listed, and
+pages of years that no longer have any dated posts are removed.
 """
 
+import html
 import os
-import re
+from datetime import datetime
 from pathlib import Path
-from bs4 import BeautifulSoup
+from post_index import archive_links, archive_pages, load_index, save_index, year_digest
+from site_index import SiteIndex
+from site_templates import load_templates
 
 WEB_DIR = Path(__file__).parent.parent
 
-# New head content template
-HEAD_TEMPLATE = """<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Posts from {year} - GC Mouli</title>
-    <link rel="icon" type="image/png" href="favicon-32x32.png">
-
-    <!-- Google Fonts -->
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Lora:ital,wght@0,400;0,500;0,600;1,400&family=Playfair+Display:wght@500;600;700&family=Source+Sans+3:wght@400;500;600&display=swap" rel="stylesheet">
-
-    <link rel="stylesheet" href="styles.css">
-
-    <!-- Google Analytics -->
-    <script async src="https://www.googletagmanager.com/gtag/js?id=G-NGJ9C40ZGL"></script>
-    <script>
-        window.dataLayer = window.dataLayer || [];
-        function gtag(){{dataLayer.push(arguments);}}
-        gtag('js', new Date());
-        gtag('config', 'G-NGJ9C40ZGL');
-    </script>
-</head>"""
-
-HEADER_TEMPLATE = """<header>
-            <h1><a href="index.html">GC Mouli</a></h1>
-            <nav>
-                <ul>
-                    <li><a href="index.html">Home</a></li>
-                    <li><a href="blog.html">Blog</a></li>
-                    <li><a href="https://sonofcauverybook.in/html/index.html">Son of Cauvery</a></li>
-                </ul>
-            </nav>
-        </header>"""
-
-FOOTER_TEMPLATE = """<footer>
-            <p>&copy; 2025 Mouli Gopalakrishnan</p>
-        </footer>"""
-
-
-def extract_post_list(soup):
-    """Extract the list of posts from the archive page."""
-    main = soup.find('main')
-    if not main:
-        return ""
-
-    # Find all list items
-    ul = main.find('ul')
-    if not ul:
-        return ""
-
-    items = []
-    for li in ul.find_all('li'):
-        a = li.find('a')
-        if a:
-            href = a.get('href', '')
-            text = a.get_text().strip()
-            items.append(f'                <li><a href="{href}">{text}</a></li>')
-
-    return '\n'.join(items)
-
-
-def update_archive(archive_path, year):
-    """Update a single year archive page."""
-    try:
-        with open(archive_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-
-        soup = BeautifulSoup(content, 'html.parser')
-        post_list = extract_post_list(soup)
-
-        # Build new HTML
-        new_html = f"""<!DOCTYPE html>
-<html lang="en">
-{HEAD_TEMPLATE.format(year=year)}
-<body>
-    <div class="container">
-        {HEADER_TEMPLATE}
-
-        <main>
-            <h2>Posts from {year}</h2>
+
+def render_archive(year, posts):
+    """Render the archive page for year from its (date, label, filename) list."""
+    items = '\n'.join(
+        f'                <li><a href="posts/{filename}">'
+        f'{datetime.strptime(date, "%Y-%m-%d").strftime("%d %b")} - {html.escape(title, quote=False)}</a></li>'
+        for date, title, filename in posts)
+    templates = load_templates()
+    return templates.page(f"Posts from {year} - {templates.site_name}", f"""            <h2>Posts from {year}</h2>
             <ul class="blog-list">
-{post_list}
+{items}
             </ul>
-            <p style="margin-top: 2rem;"><a href="blog.html" class="year-link">&larr; Back to all posts</a></p>
-        </main>
+            <p style="margin-top: 2rem;"><a href="blog.html" class="year-link">&larr; Back to all posts</a></p>""")
 
-        {FOOTER_TEMPLATE}
-    </div>
-</body>
-</html>
-"""
 
+def update_archive(archive_path, year, posts):
+    """Write a single year archive page."""
+    try:
         with open(archive_path, 'w', encoding='utf-8') as f:
-            f.write(new_html)
-
+            f.write(render_archive(year, posts))
         return True, None
 
     except Exception as e:
         return False, str(e)
 
 
-def main():
-    """Update all year archive pages."""
-    years = range(2005, 2026)
+def dropped_links(archive_path, posts, dated, existing):
+    """(filename, reason) for each post the archive page links to that posts leaves out.
+
+    dated maps each dated post to its year; existing is every post in posts/.
+    """
+    kept = {filename for _, _, filename in posts}
+    dropped = []
+    for filename, _ in archive_links(archive_path):
+        if filename in kept:
+            continue
+        if filename not in existing:
+            reason = "no such post"
+        elif filename in dated:
+            reason = f"dated {dated[filename]}"
+        else:
+            reason = "undated"
+        dropped.append((filename, reason))
+    return dropped
+
+
+def print_dropped(dropped):
+    for filename, reason in dropped:
+        print(f"    dropped posts/{filename} ({reason})")
+
+
+def main(years=None, force=False, jobs=1):
+    """Regenerate the archive pages whose posts (or page chrome) changed."""
+    with SiteIndex.open() as site:
+        changed = site.refresh(jobs)
+        by_year = {year: [(post['date'], post['label'] or post['title'], post['filename'])
+                          for post in site.posts(year)]
+                   for year in site.years()}
+        undated = site.undated()
+        existing = {post['filename'] for post in site.all_posts()}
+        total = len(existing)
+    dated = {filename: year for year, posts in by_year.items() for _, _, filename in posts}
+    print(f"Site index: {total} posts, {len(changed)} changed")
+
+    index = load_index()
+    template = load_templates().fingerprint
     success = 0
     errors = []
 
-    for year in years:
+    for year in sorted(by_year):
+        if years and year not in years:
+            continue
         archive_path = WEB_DIR / f"{year}.html"
-        if archive_path.exists():
-            ok, error = update_archive(archive_path, year)
-            if ok:
-                success += 1
-                print(f"  Updated {year}.html")
-            else:
-                errors.append((f"{year}.html", error))
+        digest = year_digest(by_year[year], template)
+        if not force and index['years'].get(str(year)) == digest and archive_path.exists():
+            continue
+        dropped = dropped_links(archive_path, by_year[year], dated, existing) if archive_path.exists() else []
+        ok, error = update_archive(archive_path, year, by_year[year])
+        if ok:
+            index['years'][str(year)] = digest
+            success += 1
+            print(f"  Updated {year}.html ({len(by_year[year])} posts)")
+            print_dropped(dropped)
         else:
-            print(f"  Skipped {year}.html (not found)")
-
-    print(f"\nCompleted: {success} archive pages updated")
+            errors.append((f"{year}.html", error))
+
+    # Years whose posts are all gone or dated elsewhere
+    removed = 0
+    for year, archive_path in archive_pages(WEB_DIR).items():
+        if year in by_year or (years and year not in years):
+            continue
+        dropped = dropped_links(archive_path, [], dated, existing)
+        if any(reason == "undated" for _, reason in dropped):
+            print(f"  Kept {year}.html: no posts are dated {year}, but it lists undated posts")
+            continue
+        os.remove(archive_path)
+        index['years'].pop(str(year), None)
+        removed += 1
+        print(f"  Removed {year}.html: no posts are dated {year}")
+        print_dropped(dropped)
+
+    save_index(index)
+    print(f"\nCompleted: {success} archive pages updated, {removed} removed")
+
+    if undated:
+        print(f"\nUndated posts, not in any archive ({len(undated)}); add a date in {Path('.post-index.json')}:")
+        for name in undated:
+            print(f"  - {name}")
 
     if errors:
         print(f"\nErrors ({len(errors)}):")
@@ -139,4 +133,13 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Regenerate year archive pages from the post index.")
+    parser.add_argument('--year', type=int, action='append',
+                        help="Only consider this year (repeatable; default: every year with posts)")
+    parser.add_argument('--force', action='store_true',
+                        help="Rewrite the pages even if their posts have not changed")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for re-indexing changed posts")
+    args = parser.parse_args()
+    main(args.year, args.force, args.jobs)
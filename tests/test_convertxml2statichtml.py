@@ -0,0 +1,84 @@
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+import convertxml2statichtml as importer
+
+POSTS = {
+    '101': ('Spring walk', 'Mon, 04 Mar 2019 09:00:00 +0000'),
+    '102': ('Monsoon notes', 'Sat, 06 Jul 2019 18:30:00 +0000'),
+    '103': ('Year in review', 'Thu, 31 Dec 2020 20:00:00 +0000'),
+}
+
+
+def write_export(path, post_ids):
+    items = ''.join(
+        f'<item><title>{POSTS[post_id][0]}</title><wp:post_id>{post_id}</wp:post_id>'
+        f'<pubDate>{POSTS[post_id][1]}</pubDate>'
+        f'<content:encoded><![CDATA[<p>{POSTS[post_id][0]} body.</p>]]></content:encoded></item>'
+        for post_id in post_ids)
+    path.write_text(
+        '<?xml version="1.0"?>\n'
+        '<rss xmlns:content="http://purl.org/rss/1.0/modules/content/" '
+        'xmlns:wp="http://wordpress.org/export/1.2/"><channel>'
+        f'{items}</channel></rss>', encoding='utf-8')
+
+
+class PartialExportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.site_root = Path(self.tmp.name)
+        (self.site_root / "posts").mkdir()
+        self.cwd = os.getcwd()
+        # The importer works on the current directory
+        os.chdir(self.site_root)
+        self.manifest = {'posts': {}}
+        self.run_import(['101', '102', '103'])
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def run_import(self, post_ids, prune=False):
+        export = self.site_root / "export.xml"
+        write_export(export, post_ids)
+        previous_years = {entry['year'] for entry in self.manifest['posts'].values()}
+        changed_years = set()
+        with redirect_stdout(StringIO()) as output:
+            posts_by_date = importer.process_posts_streaming(str(export), 1, self.manifest, changed_years, prune)
+            importer.generate_year_pages(posts_by_date, changed_years)
+            if prune:
+                importer.remove_empty_year_pages(previous_years, posts_by_date)
+        return posts_by_date, output.getvalue()
+
+    def post_files(self):
+        return sorted(path.name for path in (self.site_root / "posts").iterdir())
+
+    def test_partial_export_lists_missing_posts_and_deletes_nothing(self):
+        posts_by_date, output = self.run_import(['101'])
+        self.assertEqual(self.post_files(), ['monsoon-notes.html', 'spring-walk.html', 'year-in-review.html'])
+        self.assertEqual(len(self.manifest['posts']), 3)
+        self.assertIn('posts/monsoon-notes.html', output)
+        self.assertIn('posts/year-in-review.html', output)
+        # Posts missing from the export stay on their year pages
+        self.assertEqual([row[3] for row in posts_by_date['2019']], ['monsoon-notes.html', 'spring-walk.html'])
+        self.assertTrue((self.site_root / "2020.html").exists())
+
+    def test_prune_removes_missing_posts_and_empty_years(self):
+        posts_by_date, output = self.run_import(['101'], prune=True)
+        self.assertEqual(self.post_files(), ['spring-walk.html'])
+        self.assertEqual(len(self.manifest['posts']), 1)
+        self.assertEqual(list(posts_by_date), ['2019'])
+        year_page = (self.site_root / "2019.html").read_text(encoding='utf-8')
+        self.assertIn('posts/spring-walk.html', year_page)
+        self.assertNotIn('posts/monsoon-notes.html', year_page)
+        self.assertFalse((self.site_root / "2020.html").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+import extract_media
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves /<name>.jpg as b'<name>' * 1000, failing as the server's plan says."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            attempt = server.requests.count(self.path)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            failures = server.failures.get(self.path, [])
+            if attempt <= len(failures):
+                status = failures[attempt - 1]
+                if status == 'cut':
+                    # Promise the whole body, send half of it and hang up
+                    body = self.body()
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body[:len(body) // 2])
+                    self.close_connection = True
+                    return
+                self.send_error(status)
+                return
+            time.sleep(server.delay)
+            body = self.body()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def body(self):
+        return os.path.basename(self.path).split('.')[0].encode('ascii') * 1000
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DownloadAllTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.failures = {}
+        self.server.delay = 0
+        self.server.in_flight = self.server.max_in_flight = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.media = self.tmp.name
+        self.backoff = extract_media.RETRY_BACKOFF
+        extract_media.RETRY_BACKOFF = 0
+
+    def tearDown(self):
+        extract_media.RETRY_BACKOFF = self.backoff
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def download(self, names, **kwargs):
+        urls = [f"{self.base_url}/{name}.jpg" for name in names]
+        with redirect_stdout(StringIO()):
+            return extract_media.download_all(urls, self.media, **kwargs)
+
+    def media_files(self):
+        return sorted(os.listdir(self.media))
+
+    def test_fetches_in_parallel(self):
+        self.server.delay = 0.2
+        results = self.download(['a', 'b', 'c', 'd'], jobs=4)
+        self.assertTrue(all(entry['complete'] for entry in results.values()))
+        self.assertGreater(self.server.max_in_flight, 1)
+
+    def test_retries_429_and_5xx(self):
+        self.server.failures = {'/a.jpg': [429, 503], '/b.jpg': [500]}
+        results = self.download(['a', 'b'], jobs=2, retries=2)
+        self.assertTrue(all(entry['complete'] for entry in results.values()))
+        self.assertEqual(self.server.requests.count('/a.jpg'), 3)
+        self.assertEqual(self.server.requests.count('/b.jpg'), 2)
+
+    def test_gives_up_on_other_errors_and_after_retries(self):
+        self.server.failures = {'/a.jpg': [404], '/b.jpg': [503, 503, 503]}
+        results = self.download(['a', 'b'], jobs=2, retries=2)
+        self.assertFalse(any(entry['complete'] for entry in results.values()))
+        self.assertEqual(self.server.requests.count('/a.jpg'), 1)
+        self.assertEqual(self.server.requests.count('/b.jpg'), 3)
+
+    def test_part_file_is_renamed_only_when_complete(self):
+        self.server.failures = {'/a.jpg': ['cut']}
+        manifest = {'media': {}}
+        results = self.download(['a'], jobs=1, retries=0, manifest=manifest)
+        self.assertFalse(results[f"{self.base_url}/a.jpg"]['complete'])
+        parts = self.media_files()
+        self.assertEqual(len(parts), 1)
+        self.assertTrue(parts[0].endswith('.part'))
+
+        results = self.download(['a'], jobs=1, retries=0, manifest=manifest)
+        entry = results[f"{self.base_url}/a.jpg"]
+        self.assertTrue(entry['complete'])
+        self.assertEqual(self.media_files(), [entry['asset']])
+        with open(os.path.join(self.media, entry['asset']), 'rb') as f:
+            content = f.read()
+        self.assertEqual(content, b'a' * 1000)
+        self.assertEqual(entry['sha256'], hashlib.sha256(content).hexdigest())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+from site_index import SiteIndex
+from update_year_archives import render_archive, update_archive
+
+# As on the real 2005.html: posts sharing a date are not in title order
+ARCHIVED = [
+    ('2005-12-15', 'Amazing panoramic view of Paris', 'amazing-panoramic-view-of-paris.html'),
+    ('2005-12-15', 'Flickr How-To', 'flickr-how-to.html'),
+    ('2005-12-12', 'Can this man change M$ ?', 'can-this-man-change-m-.html'),
+    ('2005-12-12', 'Yahoo buys del.icio.us', 'yahoo-buys-delicious.html'),
+    ('2005-12-09', 'friday/holiday fun', 'fridayholiday-fun.html'),
+    ('2005-12-09', 'Personal finance Added', 'personal-finance-added.html'),
+    ("2005-12-09", "America's High-Tech Quandary", 'americas-high-tech-quandary.html'),
+]
+
+
+class UnchangedYearTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.site_root = Path(self.tmp.name)
+        self.posts_dir = self.site_root / "posts"
+        self.posts_dir.mkdir()
+        for _, title, filename in ARCHIVED:
+            (self.posts_dir / filename).write_text(
+                f"<html><head><title>{title}</title></head>"
+                f"<body><main><article><h1>{title}</h1><p>Post body.</p></article></main></body></html>",
+                encoding='utf-8')
+        self.archive_path = self.site_root / "2005.html"
+        self.archive_path.write_text(render_archive(2005, ARCHIVED), encoding='utf-8')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def rebuild(self):
+        with SiteIndex.open(self.site_root / "site_index.sqlite", self.posts_dir, self.site_root,
+                            self.site_root / ".post-index.json") as site:
+            site.refresh()
+            posts = [(post['date'], post['label'] or post['title'], post['filename'])
+                     for post in site.posts(2005)]
+        ok, error = update_archive(self.archive_path, 2005, posts)
+        self.assertTrue(ok, error)
+        return self.archive_path.read_bytes()
+
+    def test_rebuilding_an_unchanged_year_is_byte_identical(self):
+        original = self.archive_path.read_bytes()
+        # The first rebuild creates the post index from the archive page,
+        # the second works from the index alone
+        self.assertEqual(self.rebuild(), original)
+        self.assertEqual(self.rebuild(), original)
+
+
+if __name__ == '__main__':
+    unittest.main()